@@ -0,0 +1,163 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Benchmark harness -- runs the qualifying and practice solvers on synthetic inputs, and records wall time, peak memory and score for each run
+#
+#  Synopsis:
+#   Each case generates its input (see generators.py), then runs each of its solvers in a fresh subprocess, with a scratch working and output directory so that
+#   their output files don't land in the repo. Peak memory is the child's own max RSS, from os.wait4 (not available on Windows, where it is left out).
+#   Scores are read from what the solvers print: 'total score N' for qualifying and 'max_num_clients=N' for practice.
+#   Results are compared against a saved baseline: a run regresses if it is more than --tolerance slower or bigger than the baseline, or scores any lower.
+#   The qualifying cases go up to twice the size of f_find_great_mentors, to see how the scheduler scales.
+#
+#  Usage: python benchmarks/benchmark.py [--cases q_small p_small ...] [--save-baseline] [--tolerance 0.2]
+#   Exits with status 1 if anything regressed.
+#
+
+import argparse
+import json
+import os
+from pathlib import Path
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from generators import generate_pizza_input, generate_qualifying_input
+
+
+REPO_FOLDER = Path(__file__).resolve().parent.parent
+BENCHMARKS_FOLDER = Path(__file__).resolve().parent
+
+QUALIFYING_SOLVERS = {
+    'solution': [REPO_FOLDER/'qualifying'/'solution.py'],
+}
+# Exhaustive and exact solvers only get small inputs, the heuristic gets a fixed time budget
+EXACT_PIZZA_SOLVERS = {
+    'solution1': [REPO_FOLDER/'practice'/'solution1.py'],
+    'solution2': [REPO_FOLDER/'practice'/'solution2.py'],
+    'solution4': [REPO_FOLDER/'practice'/'solution4.py'],
+}
+HEURISTIC_PIZZA_SOLVERS = {
+    'solution3': [REPO_FOLDER/'practice'/'solution3.py', '{input_file}', '5'],
+}
+
+# Differences smaller than these are noise, however big they are relative to the baseline (eg. 0.04s vs 0.06s)
+MIN_REGRESSION = {'wall_seconds': 0.5, 'peak_rss_mb': 5}
+
+# Eg. {case_name: (generator, generator kwargs, solvers, score regex)}
+QUALIFYING_SCORE = r'total score (\d+)'
+PIZZA_SCORE = r'max_num_clients=(\d+)'
+CASES = {
+    'q_small': (generate_qualifying_input, {'num_people': 50, 'num_projects': 200, 'num_skills': 20}, QUALIFYING_SOLVERS, QUALIFYING_SCORE),
+    'q_medium': (generate_qualifying_input, {'num_people': 500, 'num_projects': 5000, 'num_skills': 200}, QUALIFYING_SOLVERS, QUALIFYING_SCORE),
+    'q_large': (generate_qualifying_input, {'num_people': 1000, 'num_projects': 20000, 'num_skills': 500}, QUALIFYING_SOLVERS, QUALIFYING_SCORE),
+    'q_huge': (generate_qualifying_input, {'num_people': 2000, 'num_projects': 40000, 'num_skills': 500}, QUALIFYING_SOLVERS, QUALIFYING_SCORE),
+    'p_small': (generate_pizza_input, {'num_clients': 20, 'num_ingredients': 10, 'max_likes': 3, 'max_dislikes': 3}, {**EXACT_PIZZA_SOLVERS, **HEURISTIC_PIZZA_SOLVERS}, PIZZA_SCORE),
+    'p_medium': (generate_pizza_input, {'num_clients': 2000, 'num_ingredients': 500}, HEURISTIC_PIZZA_SOLVERS, PIZZA_SCORE),
+    'p_large': (generate_pizza_input, {'num_clients': 10000, 'num_ingredients': 5000}, HEURISTIC_PIZZA_SOLVERS, PIZZA_SCORE),
+}
+# q_huge takes several minutes, so it only runs when asked for
+DEFAULT_CASES = [case_name for case_name in CASES if case_name != 'q_huge']
+
+
+# Returns (exit code, output, wall seconds, peak RSS in MB or None)
+def run_solver(command, working_folder):
+    with tempfile.TemporaryFile(mode='w+', encoding='utf8') as output_file:
+        start_time = time.perf_counter()
+        process = subprocess.Popen(command, cwd=working_folder, stdout=output_file, stderr=subprocess.STDOUT)
+        if hasattr(os, 'wait4'):
+            # wait4 gives the resource usage of this one child, where getrusage(RUSAGE_CHILDREN) would give the max over every child so far
+            pid, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in bytes on macOS, and in KB everywhere else
+            peak_rss_mb = usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+        else:
+            process.wait()
+            peak_rss_mb = None
+        wall_seconds = time.perf_counter() - start_time
+
+        output_file.seek(0)
+        return process.returncode, output_file.read(), wall_seconds, peak_rss_mb
+
+
+def run_case(case_name, inputs_folder):
+    generator, generator_kwargs, solvers, score_pattern = CASES[case_name]
+    input_file = inputs_folder/f'{case_name}.in.txt'
+    generator(input_file, **generator_kwargs)
+
+    results = {}
+    for solver_name, solver_command in solvers.items():
+        script, *solver_args = solver_command
+        command = [sys.executable, str(script)] + [arg.format(input_file=input_file) for arg in solver_args or ['{input_file}']]
+        with tempfile.TemporaryDirectory() as working_folder:
+            command += ['--output-dir', working_folder]
+            exit_code, output, wall_seconds, peak_rss_mb = run_solver(command, working_folder)
+
+        scores = re.findall(score_pattern, output)
+        if exit_code != 0 or not scores:
+            print(f'{case_name} {solver_name}: failed (exit code {exit_code})\n{output[-2000:]}')
+            results[solver_name] = {'failed': True}
+            continue
+        results[solver_name] = {'wall_seconds': wall_seconds, 'peak_rss_mb': peak_rss_mb, 'score': int(scores[-1])}
+        print(f'{case_name} {solver_name}: {wall_seconds:.2f}s, ' + (f'{peak_rss_mb:.1f} MB, ' if peak_rss_mb is not None else '') + f'score {scores[-1]}')
+    return results
+
+
+# Returns a list of regression messages, eg. ['q_large solution: wall_seconds 12.00 vs baseline 9.00']
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for case_name, case_results in results.items():
+        for solver_name, result in case_results.items():
+            baseline_result = baseline.get(case_name, {}).get(solver_name)
+            if baseline_result is None or baseline_result.get('failed'):
+                continue
+            if result.get('failed'):
+                regressions.append(f'{case_name} {solver_name}: failed')
+                continue
+            for measure, min_regression in MIN_REGRESSION.items():
+                if result[measure] is None or baseline_result.get(measure) is None:
+                    continue
+                if result[measure] > baseline_result[measure] * (1 + tolerance) and result[measure] - baseline_result[measure] > min_regression:
+                    regressions.append(f'{case_name} {solver_name}: {measure} {result[measure]:.2f} vs baseline {baseline_result[measure]:.2f}')
+            if result['score'] < baseline_result['score']:
+                regressions.append(f'{case_name} {solver_name}: score {result["score"]} vs baseline {baseline_result["score"]}')
+    return regressions
+
+
+def main(case_names, baseline_file, save_baseline, tolerance):
+    inputs_folder = BENCHMARKS_FOLDER/'generated'
+    inputs_folder.mkdir(parents=True, exist_ok=True)
+
+    results = {case_name: run_case(case_name, inputs_folder) for case_name in case_names}
+    (BENCHMARKS_FOLDER/'latest.json').write_text(json.dumps(results, indent=1), encoding='utf8')
+
+    if save_baseline:
+        # Only the cases that were run are replaced, so a baseline can be built up a few cases at a time
+        baseline = json.loads(baseline_file.read_text(encoding='utf8')) if baseline_file.exists() else {}
+        baseline.update(results)
+        baseline_file.write_text(json.dumps(baseline, indent=1), encoding='utf8')
+        print(f'Baseline saved to {baseline_file}')
+        return 0
+
+    if not baseline_file.exists():
+        print(f'No baseline at {baseline_file} to compare against -- run with --save-baseline first')
+        return 0
+
+    regressions = find_regressions(results, json.loads(baseline_file.read_text(encoding='utf8')), tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if not regressions:
+        print('No regressions against the baseline')
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the solvers on synthetic inputs, and compare against a saved baseline')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=DEFAULT_CASES)
+    parser.add_argument('--baseline', type=Path, default=BENCHMARKS_FOLDER/'baseline.json')
+    parser.add_argument('--save-baseline', action='store_true', help='save these results as the new baseline instead of comparing against it')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='how much slower or bigger than the baseline counts as a regression, eg. 0.2 => 20%%')
+    args = parser.parse_args()
+
+    sys.exit(main(args.cases, args.baseline, args.save_baseline, args.tolerance))
@@ -0,0 +1,67 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Synthetic input generators for benchmarking, in the same formats as the contest inputs
+#
+#  Synopsis:
+#   Every generator is seeded, so the same parameters always give the same file, and a benchmark case can be regenerated rather than stored.
+#   Qualifying projects only ask for skills at levels that someone has (or can reach with a mentor), so a good share of them can be staffed, as in the contest inputs.
+#
+
+import random
+
+
+def make_name(rng, length=8):
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for i in range(length))
+
+
+def make_unique_names(rng, count, prefix):
+    return [f'{prefix}{i}_{make_name(rng, 4)}' for i in range(count)]
+
+
+def generate_qualifying_input(output_file, num_people, num_projects, num_skills, max_skills_per_person=5, max_roles=10, max_level=10, max_duration=100, seed=0):
+    rng = random.Random(seed)
+    skill_names = make_unique_names(rng, num_skills, 'skill')
+    person_names = make_unique_names(rng, num_people, 'person')
+    project_names = make_unique_names(rng, num_projects, 'project')
+
+    # Highest level anyone has for each skill, so roles never ask for more than that
+    max_skill_levels = [0] * num_skills
+    lines = [f'{num_people} {num_projects}']
+    for person_name in person_names:
+        skill_ids = rng.sample(range(num_skills), rng.randint(1, min(max_skills_per_person, num_skills)))
+        lines.append(f'{person_name} {len(skill_ids)}')
+        for skill_id in skill_ids:
+            skill_level = rng.randint(1, max_level)
+            max_skill_levels[skill_id] = max(max_skill_levels[skill_id], skill_level)
+            lines.append(f'{skill_names[skill_id]} {skill_level}')
+
+    known_skill_ids = [skill_id for skill_id in range(num_skills) if max_skill_levels[skill_id]]
+    # Roughly enough days to do every project one after the other, spread over the workforce
+    horizon = max(1, num_projects * max_duration // (2 * max(1, num_people // max_roles)))
+    for project_name in project_names:
+        duration = rng.randint(1, max_duration)
+        score = rng.randint(1, 1000)
+        best_before = rng.randint(duration, duration + horizon)
+        skill_ids = rng.sample(known_skill_ids, rng.randint(1, min(max_roles, len(known_skill_ids))))
+        lines.append(f'{project_name} {duration} {score} {best_before} {len(skill_ids)}')
+        for skill_id in skill_ids:
+            lines.append(f'{skill_names[skill_id]} {rng.randint(1, max_skill_levels[skill_id])}')
+
+    with open(output_file, 'w', encoding='utf8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def generate_pizza_input(output_file, num_clients, num_ingredients, max_likes=5, max_dislikes=5, seed=0):
+    rng = random.Random(seed)
+    ingredient_names = make_unique_names(rng, num_ingredients, 'ingredient')
+
+    lines = [str(num_clients)]
+    for i in range(num_clients):
+        num_likes = rng.randint(1, min(max_likes, num_ingredients))
+        num_dislikes = rng.randint(0, min(max_dislikes, num_ingredients - num_likes))
+        ingredient_ids = rng.sample(range(num_ingredients), num_likes + num_dislikes)
+        lines.append(' '.join([str(num_likes)] + [ingredient_names[j] for j in ingredient_ids[:num_likes]]))
+        lines.append(' '.join([str(num_dislikes)] + [ingredient_names[j] for j in ingredient_ids[num_likes:]]))
+
+    with open(output_file, 'w', encoding='utf8') as f:
+        f.write('\n'.join(lines) + '\n')
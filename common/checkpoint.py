@@ -0,0 +1,117 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Periodic checkpoints of solver state, so that long runs can be resumed after being interrupted
+#
+#  Synopsis:
+#   A checkpoint file is a small fixed header followed by a list of sections, each one length-prefixed raw bytes (typically array('i').tobytes()), all zlib
+#   compressed. The header holds a magic number, the format version, the kind of solver that wrote it, and a CRC32 of the input file, so a checkpoint is
+#   only ever loaded back into the same solver and the same input, and anything else is ignored rather than half-loaded.
+#   Files are written to a temporary file and renamed over the old one, so an interruption during a save never leaves a broken checkpoint behind.
+#   Each kind gets its own file per input (see get_checkpoint_file), so runs of different kinds on the same input never overwrite or remove each other's checkpoint.
+#
+
+import os
+from pathlib import Path
+import struct
+import time
+import zlib
+
+
+MAGIC = b'HCCP'
+FORMAT_VERSION = 1
+# Magic, format version, solver kind (4 bytes, eg. b'QUAL'), input CRC32, number of sections
+HEADER = struct.Struct('<4sH4sII')
+SECTION_LENGTH = struct.Struct('<Q')
+DEFAULT_INTERVAL_SECONDS = 30
+
+
+# Eg. checkpoints/a_an_example.in.txt.QUAL.ckpt
+def get_checkpoint_file(checkpoint_folder, input_file, kind):
+    return Path(checkpoint_folder)/f'{Path(input_file).name}.{kind.decode("ascii")}.ckpt'
+
+
+def get_input_digest(input_file):
+    digest = 0
+    with open(input_file, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            digest = zlib.crc32(chunk, digest)
+    return digest
+
+
+# Eg. int_to_bytes(best_combo_mask) -- for big ints that don't fit in an array('i')
+def int_to_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def int_from_bytes(data):
+    return int.from_bytes(data, 'little')
+
+
+class Checkpoint:
+    def __init__(self, checkpoint_file, kind, input_file, interval_seconds=DEFAULT_INTERVAL_SECONDS):
+        self.checkpoint_file = Path(checkpoint_file)
+        self.kind = kind
+        self.input_digest = get_input_digest(input_file)
+        self.interval_seconds = interval_seconds
+        self.last_save_time = time.perf_counter()
+
+    # True once interval_seconds have passed since the last save
+    def is_due(self):
+        return time.perf_counter() - self.last_save_time >= self.interval_seconds
+
+    def save(self, sections):
+        body = bytearray()
+        for section in sections:
+            body += SECTION_LENGTH.pack(len(section))
+            body += section
+        data = HEADER.pack(MAGIC, FORMAT_VERSION, self.kind, self.input_digest, len(sections)) + zlib.compress(bytes(body), 1)
+
+        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per process, so concurrent runs never write to each other's temporary file
+        temp_file = self.checkpoint_file.with_name(f'{self.checkpoint_file.name}.{os.getpid()}.tmp')
+        temp_file.write_bytes(data)
+        os.replace(temp_file, self.checkpoint_file)
+        self.last_save_time = time.perf_counter()
+
+    # Returns (kind, number of sections, data) from the checkpoint file, or None if there is none for this input
+    def read_header(self):
+        if not self.checkpoint_file.exists():
+            return None
+        data = self.checkpoint_file.read_bytes()
+        if len(data) < HEADER.size:
+            return None
+        magic, format_version, kind, input_digest, num_sections = HEADER.unpack_from(data)
+        if (magic, format_version, input_digest) != (MAGIC, FORMAT_VERSION, self.input_digest):
+            return None
+        return kind, num_sections, data
+
+    # Kind of the solver that saved the checkpoint for this input (eg. to tell the user they resumed with different options), or None if there is none
+    def get_saved_kind(self):
+        header = self.read_header()
+        return header[0] if header else None
+
+    # Returns the saved sections, or None if there is no usable checkpoint for this solver and input
+    def load(self):
+        header = self.read_header()
+        if header is None:
+            return None
+        kind, num_sections, data = header
+        if kind != self.kind:
+            return None
+        try:
+            body = zlib.decompress(data[HEADER.size:])
+        except zlib.error:
+            return None
+
+        sections = []
+        pos = 0
+        for i in range(num_sections):
+            (length,) = SECTION_LENGTH.unpack_from(body, pos)
+            pos += SECTION_LENGTH.size
+            sections.append(body[pos:pos + length])
+            pos += length
+        return sections
+
+    # Once a run has finished there is nothing left to resume
+    def remove(self):
+        self.checkpoint_file.unlink(missing_ok=True)
@@ -0,0 +1,138 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: On-disk cache of parsed inputs (see loader.py), so that repeated runs on the same input skip parsing
+#
+#  Synopsis:
+#   Cache files are keyed by a SHA-256 of the input file's contents, plus the cache format version, so an edited input or a new format simply misses the cache
+#   and stale entries are never read. Each file holds a small header, a table of fields, then each field as one 8-byte aligned block: array('i') columns as
+#   raw int32s, and name lists as newline separated UTF-8. The file is mmapped on load, and every array is copied out with a single frombytes() call.
+#   The cache folder is capped in size: each hit refreshes the file's modification time, and the least recently used files are deleted once the cap is exceeded.
+#
+
+from array import array
+import hashlib
+import mmap
+import os
+from pathlib import Path
+import struct
+
+from common.loader import NameTable, PizzaInput, QualifyingInput, load_pizza_input, load_qualifying_input
+
+
+FORMAT_VERSION = 1
+MAGIC = b'HCIC'
+DEFAULT_CACHE_FOLDER = Path(__file__).resolve().parent.parent/'.cache'/'inputs'
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Magic, format version, number of fields
+HEADER = struct.Struct('<4sHI')
+# Field name (padded), field type, offset, length in bytes
+FIELD = struct.Struct('<32s1sQQ')
+ARRAY_FIELD, NAME_TABLE_FIELD, NAME_LIST_FIELD = b'A', b'T', b'L'
+
+
+def get_content_hash(input_file):
+    content_hash = hashlib.sha256()
+    with open(input_file, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def encode_field(value):
+    if isinstance(value, array):
+        return ARRAY_FIELD, value.tobytes()
+    if isinstance(value, NameTable):
+        return NAME_TABLE_FIELD, '\n'.join(value.names).encode('utf8')
+    return NAME_LIST_FIELD, '\n'.join(value).encode('utf8')
+
+
+def decode_field(field_type, data):
+    if field_type == ARRAY_FIELD:
+        values = array('i')
+        values.frombytes(data)
+        return values
+    names = data.decode('utf8').split('\n') if data else []
+    if field_type == NAME_TABLE_FIELD:
+        name_table = NameTable()
+        name_table.names = names
+        name_table.ids = {name: name_id for name_id, name in enumerate(names)}
+        return name_table
+    return names
+
+
+def write_cache_file(cache_file, data):
+    fields = [(field_name, *encode_field(value)) for field_name, value in vars(data).items()]
+
+    body = bytearray()
+    table = []
+    offset = HEADER.size + FIELD.size * len(fields)
+    for field_name, field_type, field_data in fields:
+        # 8-byte aligned, so every array can be read in place from the mmap
+        padding = -(offset + len(body)) % 8
+        body += bytes(padding)
+        table.append(FIELD.pack(field_name.encode('ascii'), field_type, offset + len(body), len(field_data)))
+        body += field_data
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = cache_file.with_name(cache_file.name + f'.{os.getpid()}.tmp')
+    with open(temp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(fields)))
+        f.write(b''.join(table))
+        f.write(body)
+    os.replace(temp_file, cache_file)
+
+
+# Returns the cached input, or None if the cache file is missing, from another format version, or damaged
+def read_cache_file(cache_file, data_class):
+    try:
+        with open(cache_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, format_version, num_fields = HEADER.unpack_from(mm)
+            if magic != MAGIC or format_version != FORMAT_VERSION:
+                return None
+            data = data_class()
+            for i in range(num_fields):
+                field_name, field_type, offset, length = FIELD.unpack_from(mm, HEADER.size + FIELD.size * i)
+                if offset + length > len(mm):
+                    return None
+                setattr(data, field_name.rstrip(b'\0').decode('ascii'), decode_field(field_type, mm[offset:offset + length]))
+            return data
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+# Delete the least recently used cache files until the folder fits in max_cache_bytes
+def evict_cache_files(cache_folder, max_cache_bytes):
+    cache_files = [(cache_file.stat(), cache_file) for cache_file in cache_folder.glob('*.bin')]
+    total_bytes = sum(stat.st_size for stat, cache_file in cache_files)
+    for stat, cache_file in sorted(cache_files, key=lambda entry: entry[0].st_mtime):
+        if total_bytes <= max_cache_bytes:
+            break
+        cache_file.unlink(missing_ok=True)
+        total_bytes -= stat.st_size
+
+
+def load_cached(input_file, kind, data_class, load_input, cache_folder=DEFAULT_CACHE_FOLDER, max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    cache_folder = Path(cache_folder)
+    cache_file = cache_folder/f'{kind}-{get_content_hash(input_file)}-v{FORMAT_VERSION}.bin'
+
+    data = read_cache_file(cache_file, data_class) if cache_file.exists() else None
+    if data is not None:
+        # Mark as recently used
+        os.utime(cache_file)
+        return data
+
+    data = load_input(input_file)
+    write_cache_file(cache_file, data)
+    evict_cache_files(cache_folder, max_cache_bytes)
+    return data
+
+
+# Same as load_qualifying_input, but parsed once per distinct input and then read back from the cache
+def load_qualifying_input_cached(input_file, cache_folder=DEFAULT_CACHE_FOLDER, max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    return load_cached(input_file, 'qualifying', QualifyingInput, load_qualifying_input, cache_folder, max_cache_bytes)
+
+
+# Same as load_pizza_input, but parsed once per distinct input and then read back from the cache
+def load_pizza_input_cached(input_file, cache_folder=DEFAULT_CACHE_FOLDER, max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    return load_cached(input_file, 'pizza', PizzaInput, load_pizza_input, cache_folder, max_cache_bytes)
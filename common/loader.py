@@ -0,0 +1,148 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Shared loader for Hash Code 2022 input files (qualifying round and 'Pizza' practice problem)
+#
+#  Synopsis:
+#   Each file is read in a single pass and split into tokens once. Skill, ingredient and person names are interned into integer ids, and everything else is stored in
+#   flat array('i') columns. Variable length data (a person's skills, a project's roles, a client's likes) is stored CSR-style: one flat array of values, plus an
+#   array of start offsets, so that the values for row i are values[start[i]:start[i + 1]].
+#
+
+from array import array
+
+
+class NameTable:
+    def __init__(self):
+        # Eg. ['C++', 'HTML'] -- id => name
+        self.names = []
+        # Eg. {'C++': 0, 'HTML': 1} -- name => id
+        self.ids = {}
+
+    def intern(self, name):
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.ids[name] = name_id
+            self.names.append(name)
+        return name_id
+
+    def __len__(self):
+        return len(self.names)
+
+
+class QualifyingInput:
+    def __init__(self):
+        self.skills = NameTable()
+        self.person_names = []
+        self.project_names = []
+
+        # Person i has skills person_skill_ids[person_skill_start[i]:person_skill_start[i + 1]], at the matching person_skill_levels
+        self.person_skill_start = array('i', [0])
+        self.person_skill_ids = array('i')
+        self.person_skill_levels = array('i')
+
+        self.project_durations = array('i')
+        self.project_scores = array('i')
+        self.project_best_befores = array('i')
+        # Project i has roles project_role_skill_ids[project_role_start[i]:project_role_start[i + 1]], at the matching project_role_levels
+        self.project_role_start = array('i', [0])
+        self.project_role_skill_ids = array('i')
+        self.project_role_levels = array('i')
+
+    @property
+    def num_people(self):
+        return len(self.person_names)
+
+    @property
+    def num_projects(self):
+        return len(self.project_names)
+
+    # Eg. [(skill_id, level), ...]
+    def person_skills(self, person_id):
+        start, end = self.person_skill_start[person_id], self.person_skill_start[person_id + 1]
+        return list(zip(self.person_skill_ids[start:end], self.person_skill_levels[start:end]))
+
+    # Eg. [(skill_id, required_level), ...]
+    def project_roles(self, project_id):
+        start, end = self.project_role_start[project_id], self.project_role_start[project_id + 1]
+        return list(zip(self.project_role_skill_ids[start:end], self.project_role_levels[start:end]))
+
+
+class PizzaInput:
+    def __init__(self):
+        self.ingredients = NameTable()
+
+        # Client i likes client_like_ids[client_like_start[i]:client_like_start[i + 1]]
+        self.client_like_start = array('i', [0])
+        self.client_like_ids = array('i')
+        # Client i dislikes client_dislike_ids[client_dislike_start[i]:client_dislike_start[i + 1]]
+        self.client_dislike_start = array('i', [0])
+        self.client_dislike_ids = array('i')
+
+    @property
+    def num_clients(self):
+        return len(self.client_like_start) - 1
+
+    def client_likes(self, client_id):
+        return self.client_like_ids[self.client_like_start[client_id]:self.client_like_start[client_id + 1]]
+
+    def client_dislikes(self, client_id):
+        return self.client_dislike_ids[self.client_dislike_start[client_id]:self.client_dislike_start[client_id + 1]]
+
+
+def read_tokens(input_file):
+    # One read and one split for the whole file, instead of a readline() and split() per line
+    with open(input_file, 'rb') as f:
+        return f.read().decode('utf8').split()
+
+
+def load_qualifying_input(input_file):
+    tokens = read_tokens(input_file)
+    data = QualifyingInput()
+    intern_skill = data.skills.intern
+
+    num_people, num_projects = int(tokens[0]), int(tokens[1])
+    pos = 2
+
+    for i in range(num_people):
+        data.person_names.append(tokens[pos])
+        end = pos + 2 + 2*int(tokens[pos + 1])
+        data.person_skill_ids.extend(map(intern_skill, tokens[pos + 2:end:2]))
+        data.person_skill_levels.extend(map(int, tokens[pos + 3:end:2]))
+        data.person_skill_start.append(len(data.person_skill_ids))
+        pos = end
+
+    for i in range(num_projects):
+        data.project_names.append(tokens[pos])
+        data.project_durations.append(int(tokens[pos + 1]))
+        data.project_scores.append(int(tokens[pos + 2]))
+        data.project_best_befores.append(int(tokens[pos + 3]))
+        end = pos + 5 + 2*int(tokens[pos + 4])
+        data.project_role_skill_ids.extend(map(intern_skill, tokens[pos + 5:end:2]))
+        data.project_role_levels.extend(map(int, tokens[pos + 6:end:2]))
+        data.project_role_start.append(len(data.project_role_skill_ids))
+        pos = end
+
+    return data
+
+
+def load_pizza_input(input_file):
+    tokens = read_tokens(input_file)
+    data = PizzaInput()
+    intern_ingredient = data.ingredients.intern
+
+    num_clients = int(tokens[0])
+    pos = 1
+
+    for i in range(num_clients):
+        end = pos + 1 + int(tokens[pos])
+        data.client_like_ids.extend(map(intern_ingredient, tokens[pos + 1:end]))
+        data.client_like_start.append(len(data.client_like_ids))
+        pos = end
+
+        end = pos + 1 + int(tokens[pos])
+        data.client_dislike_ids.extend(map(intern_ingredient, tokens[pos + 1:end]))
+        data.client_dislike_start.append(len(data.client_dislike_ids))
+        pos = end
+
+    return data
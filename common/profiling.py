@@ -0,0 +1,87 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Lightweight instrumentation for the solvers -- counters, timers and per-day series, written out as a JSON report
+#
+#  Synopsis:
+#   Solvers take an optional profiler, and only touch it behind an 'if profiler:' check, so a run without --profile pays for a None test and nothing else.
+#   Counting calls to a hot method (eg. SkillIndex.find_min_person) is done by wrapping the method on that one instance with count_calls, rather than by adding
+#   counting code to the method itself, so the unprofiled method stays exactly as fast as before.
+#   For a full call-level picture, run_with_cprofile also saves cProfile stats, which can be browsed with pstats or turned into a flamegraph (eg. with snakeviz or flameprof).
+#
+
+import cProfile
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+import json
+from pathlib import Path
+import time
+
+
+class Profiler:
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        # Eg. {'projects_attempted': 1234}
+        self.counters = defaultdict(int)
+        # Eg. {'parse': 0.25} -- total seconds
+        self.timers = defaultdict(float)
+        # Eg. {'days': [{'day': 3, 'attempted': 10, 'scheduled': 2}, ...]}
+        self.series = defaultdict(list)
+
+    def count(self, counter_name, amount=1):
+        self.counters[counter_name] += amount
+
+    @contextmanager
+    def timer(self, timer_name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[timer_name] += time.perf_counter() - start_time
+
+    def record(self, series_name, **values):
+        self.series[series_name].append(values)
+
+    # Count every call to obj.method_name, by shadowing the method on this instance only
+    def count_calls(self, obj, method_name, counter_name=None):
+        method = getattr(obj, method_name)
+        counters = self.counters
+        counter_name = counter_name or method_name
+
+        def counted_method(*args, **kwargs):
+            counters[counter_name] += 1
+            return method(*args, **kwargs)
+
+        setattr(obj, method_name, counted_method)
+
+    # Counters and timers, plus each counter per second of the whole run (eg. combos evaluated per second)
+    def make_report(self):
+        total_seconds = time.perf_counter() - self.start_time
+        return {
+            'total_seconds': total_seconds,
+            'timers': dict(self.timers),
+            'counters': dict(self.counters),
+            'rates_per_second': {counter_name: count / total_seconds for counter_name, count in self.counters.items()} if total_seconds > 0 else {},
+            'series': dict(self.series),
+        }
+
+    def write_report(self, report_file):
+        report_file = Path(report_file)
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_file, 'w', encoding='utf8') as f:
+            json.dump(self.make_report(), f, indent=1)
+
+
+# Eg. with timed(profiler, 'parse'): ... -- does nothing when profiler is None
+def timed(profiler, timer_name):
+    return profiler.timer(timer_name) if profiler else nullcontext()
+
+
+# Returns function(*args), having saved cProfile stats for the call to cprofile_file
+def run_with_cprofile(cprofile_file, function, *args):
+    cprofile_file = Path(cprofile_file)
+    cprofile_file.parent.mkdir(parents=True, exist_ok=True)
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(function, *args)
+    finally:
+        profile.dump_stats(cprofile_file)
@@ -0,0 +1,92 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Shared submission writer for the qualifying round and the 'Pizza' practice problem
+#
+#  Synopsis:
+#   A submission is validated, built in memory as one string, then written to a temporary file next to the real one and renamed over it. The rename is atomic,
+#   so a reader (or a concurrent run writing the same file) only ever sees a complete old file or a complete new one, never half of each.
+#   Validation is a quick structural pass that catches simulator bugs before they reach a submission -- the full replay with the official rules is in
+#   qualifying/scorer.py. Each check only runs when the caller passes what it needs (eg. known names), and any problem raises a ValueError.
+#
+
+from collections import defaultdict
+import os
+from pathlib import Path
+
+
+def write_atomically(output_file, text):
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per process, so concurrent runs never write to each other's temporary file
+    temp_file = output_file.with_name(f'{output_file.name}.{os.getpid()}.tmp')
+    with open(temp_file, 'w', encoding='utf8') as f:
+        f.write(text)
+    os.replace(temp_file, output_file)
+
+
+# Schedule is eg. [('WebServer', ['Bob', 'Anna']), ...].
+# project_num_roles (eg. {'WebServer': 2}) checks that project names are known and every role is filled, person_names (eg. {'Bob', 'Anna'}) checks contributor names,
+# and time_slots (eg. [(start_day, end_day), ...], one per project) checks that nobody works on two projects at once.
+def validate_qualifying_submission(schedule, project_num_roles=None, person_names=None, time_slots=None):
+    scheduled_projects = set()
+    for project_name, contributors in schedule:
+        if project_name in scheduled_projects:
+            raise ValueError(f'Project {project_name} is scheduled more than once')
+        scheduled_projects.add(project_name)
+
+        if project_num_roles is not None:
+            if project_name not in project_num_roles:
+                raise ValueError(f'Unknown project {project_name}')
+            if len(contributors) != project_num_roles[project_name]:
+                raise ValueError(f'Project {project_name} has {len(contributors)} contributors for {project_num_roles[project_name]} roles')
+        if len(set(contributors)) != len(contributors):
+            raise ValueError(f'Project {project_name} has the same contributor in more than one role')
+        if person_names is not None:
+            for contributor in contributors:
+                if contributor not in person_names:
+                    raise ValueError(f'Unknown contributor {contributor} on project {project_name}')
+
+    if time_slots is not None:
+        # Eg. {'Bob': [(start_day, end_day, project_name), ...]}
+        person_time_slots = defaultdict(list)
+        for (project_name, contributors), (start_day, end_day) in zip(schedule, time_slots):
+            for contributor in contributors:
+                person_time_slots[contributor].append((start_day, end_day, project_name))
+        for contributor, slots in person_time_slots.items():
+            slots.sort()
+            for (start_day, end_day, project_name), (next_start_day, next_end_day, next_project_name) in zip(slots, slots[1:]):
+                if next_start_day < end_day:
+                    raise ValueError(f'{contributor} is on {project_name} and {next_project_name} at the same time (day {next_start_day})')
+
+
+def format_qualifying_submission(schedule):
+    lines = [str(len(schedule))]
+    for project_name, contributors in schedule:
+        lines.append(project_name)
+        lines.append(' '.join(contributors))
+    return '\n'.join(lines) + '\n'
+
+
+def write_qualifying_submission(output_file, schedule, project_num_roles=None, person_names=None, time_slots=None):
+    validate_qualifying_submission(schedule, project_num_roles, person_names, time_slots)
+    write_atomically(output_file, format_qualifying_submission(schedule))
+
+
+# ingredient_names (eg. {'cheese', 'tomatoes'}) checks that every ingredient is known
+def validate_pizza_submission(ingredients, ingredient_names=None):
+    if len(set(ingredients)) != len(ingredients):
+        raise ValueError('Pizza has the same ingredient more than once')
+    if ingredient_names is not None:
+        for ingredient in ingredients:
+            if ingredient not in ingredient_names:
+                raise ValueError(f'Unknown ingredient {ingredient}')
+
+
+# Eg. '3 cheese mushrooms tomatoes'
+def format_pizza_submission(ingredients):
+    return ' '.join([str(len(ingredients))] + list(ingredients))
+
+
+def write_pizza_submission(output_file, ingredients, ingredient_names=None):
+    validate_pizza_submission(ingredients, ingredient_names)
+    write_atomically(output_file, format_pizza_submission(ingredients))
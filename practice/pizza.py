@@ -0,0 +1,86 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Bitset helpers shared by the 'Pizza' practice problem solvers
+#
+#  Synopsis:
+#   Ingredient i (its interned id, see common.loader) is bit i. Each client's likes and dislikes are stored as one int bitmask each, and so is a pizza.
+#   A client is satisfied by a pizza when all of their likes are on it and none of their dislikes are:
+#       (likes_mask & pizza_mask) == likes_mask and not (dislikes_mask & pizza_mask)
+#   Python ints are arbitrary precision, so this works however many ingredients there are, and each check is a couple of C-level word operations.
+#   Scoring a whole pizza goes the other way round, over ingredients rather than clients: with liked_by/disliked_by as bitmasks of clients per ingredient
+#   (see make_ingredient_client_masks), a client is unhappy if they dislike an ingredient on the pizza or like one that's missing, so
+#       satisfied = all clients - OR(disliked_by[i] for i on the pizza) - OR(liked_by[i] for i not on the pizza)
+#   which is one big-int OR per ingredient. The per-client check is only worth it where a search aborts early (see solution1.evaluate_combo).
+#
+
+from functools import reduce
+from itertools import compress
+from operator import or_
+
+from common.submission import write_pizza_submission
+
+
+# Turn the digits of a reversed bin() string into compress() selectors: ON_PIZZA keeps the ingredients on the pizza, OFF_PIZZA keeps the rest
+ON_PIZZA = bytes.maketrans(b'01', b'\x00\x01')
+OFF_PIZZA = bytes.maketrans(b'01', b'\x01\x00')
+
+
+# Returns [(likes_mask, dislikes_mask), ...], one per client
+def make_client_masks(data):
+    client_masks = []
+    for client_id in range(data.num_clients):
+        likes_mask = 0
+        for ingredient_id in data.client_likes(client_id):
+            likes_mask |= 1 << ingredient_id
+        dislikes_mask = 0
+        for ingredient_id in data.client_dislikes(client_id):
+            dislikes_mask |= 1 << ingredient_id
+        client_masks.append((likes_mask, dislikes_mask))
+    return client_masks
+
+
+# Number of clients satisfied by pizza_mask, with liked_by and disliked_by from make_ingredient_client_masks
+def count_satisfied(liked_by, disliked_by, num_clients, pizza_mask):
+    # Eg. b'1101' => ingredients 0, 1 and 3 are on the pizza -- one string, rather than shifting pizza_mask for every ingredient
+    digits = bin(pizza_mask)[:1:-1].ljust(len(liked_by), '0').encode('ascii')
+    # compress and reduce keep the loop over ingredients in C
+    unhappy = reduce(or_, compress(disliked_by, digits.translate(ON_PIZZA)), 0) | reduce(or_, compress(liked_by, digits.translate(OFF_PIZZA)), 0)
+    return num_clients - unhappy.bit_count()
+
+
+def mask_to_ingredients(pizza_mask, ingredient_names):
+    return [ingredient_names[i] for i in range(pizza_mask.bit_length()) if pizza_mask >> i & 1]
+
+
+# Returns (liked_by, disliked_by) -- eg. liked_by[ingredient_id] = bitmask of the clients who like it
+def make_ingredient_client_masks(client_masks, num_ingredients):
+    liked_by = [0] * num_ingredients
+    disliked_by = [0] * num_ingredients
+    for client_id, (likes_mask, dislikes_mask) in enumerate(client_masks):
+        client_bit = 1 << client_id
+        for ingredient_id in iterate_bits(likes_mask):
+            liked_by[ingredient_id] |= client_bit
+        for ingredient_id in iterate_bits(dislikes_mask):
+            disliked_by[ingredient_id] |= client_bit
+    return liked_by, disliked_by
+
+
+# Yields the index of each set bit, lowest first
+def iterate_bits(mask):
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+# Pizza satisfying every client in clients_mask, provided none of them conflict: all of their likes
+def make_pizza(clients_mask, client_masks):
+    pizza_mask = 0
+    for client_id in iterate_bits(clients_mask):
+        pizza_mask |= client_masks[client_id][0]
+    return pizza_mask
+
+
+# Write a pizza in the official output format, eg. '3 cheese mushrooms tomatoes'
+def write_pizza(output_file, pizza_mask, ingredient_names):
+    write_pizza_submission(output_file, sorted(mask_to_ingredients(pizza_mask, ingredient_names)))
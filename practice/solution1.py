@@ -4,160 +4,194 @@
 #
 # Currently, this brute force solution (containing some minor optimizations) is too slow to evaluate the last two test cases ('d' and 'e')
 
-from itertools import combinations
-from math import factorial, trunc
+import argparse
+from array import array
+from itertools import combinations, islice
+from math import comb
 from pathlib import Path
 from pprint import pprint
 import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.checkpoint import Checkpoint, get_checkpoint_file, int_from_bytes, int_to_bytes
+from common.input_cache import load_pizza_input_cached
+from common.profiling import Profiler, run_with_cprofile, timed
+from common.submission import write_pizza_submission
+from pizza import make_client_masks, mask_to_ingredients
 
 
 # Constants
 
+# Combos are generated and evaluated this many at a time, so memory stays flat however many combos there are
+COMBO_CHUNK_SIZE = 4096
+PROGRESS_INTERVAL_SECONDS = 5
+
 # Strategies:
-# Check if likes are larger than current combo
-# Check dislikes first, since if one dislike is there, than we can return immediately
+# Store each client's likes and dislikes, and each combo, as bitmasks, so checking a client is a couple of AND operations
 # For each iteration, check if it's possible to get a new best solution, otherwise return to save processing time
+# Generate combos lazily and in chunks, instead of building a list of every combo of a given size up front
 
 # Functions
 
-def evaluate_combo(combo, clients_preferences, total_num_clients, max_num_clients):
+# Combo and clients are bitmasks over ingredient ids -- see pizza.py
+def evaluate_combo(combo_mask, clients_preferences, total_num_clients, max_num_clients):
 
     num_clients = 0
     error_margin = total_num_clients - max_num_clients
     num_failures = 0
 
-    for potential_client in clients_preferences:
+    for likes_mask, dislikes_mask in clients_preferences:
 
         if num_failures >= error_margin:
             #print(f'Num failures ({num_failures}) >= error margin ({error_margin}) -- aborting ...')
             return num_clients
 
-        found_conflict = False
-
-        # Num combo ingredients should be >= num likes
-        if len(potential_client['likes']) > len(combo):
-            #print('Num combo ingredients should be >= num likes')
-            found_conflict = True
+        # All likes present, and no dislikes present
+        if (likes_mask & combo_mask) == likes_mask and not (dislikes_mask & combo_mask):
+            num_clients += 1
+        else:
             num_failures += 1
-            continue
 
-        # No dislikes present
-        for dislike in potential_client['dislikes']:
-            if dislike in combo:
-                found_conflict = True
-                num_failures += 1
-                #print('No dislikes should be present')
-                break
+    return num_clients
 
-        if found_conflict:
+
+# Yields every combo mask, smallest combos first, skipping the first start combos (eg. the ones evaluated before a checkpoint)
+def generate_combos(ingredients, start=0):
+    ingredient_bits = [1 << i for i in ingredients]
+    for num_choose in range(1, len(ingredient_bits)+1):
+        # Whole combo sizes are skipped by counting them, and the rest by islice, which skips at C speed without evaluating anything
+        num_combos = comb(len(ingredient_bits), num_choose)
+        if start >= num_combos:
+            start -= num_combos
             continue
-        
-        # All likes present
-        for like in potential_client['likes']:
-            if like not in combo:
-                found_conflict = True
-                num_failures += 1
-                #print('All likes should be present')
-                break
-
-        if not found_conflict:
-            #print('No conflicts')
-            num_clients += 1
+        # Eg. combo = (0b0001, 0b0100, 0b1000) => combo mask 0b1101
+        for combo in islice(combinations(ingredient_bits, num_choose), start, None):
+            yield sum(combo)
+        start = 0
+
+
+# Yields lists of up to chunk_size items from iterable
+def generate_chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
 
-    return num_clients
 
+# Checkpoint sections: the number of combos evaluated so far (ie. the enumeration cursor), the best combo mask, and [max_num_clients]
+def save_combo_checkpoint(checkpoint, combo_counter, max_combo, max_num_clients):
+    checkpoint.save([int_to_bytes(combo_counter), int_to_bytes(max_combo), array('i', [max_num_clients]).tobytes()])
 
-def process_test_case(total_num_clients, clients_preferences, ingredients, total_num_combos):
+
+def load_combo_checkpoint(sections):
+    combo_counter_section, max_combo_section, max_num_clients_section = sections
+    return int_from_bytes(combo_counter_section), int_from_bytes(max_combo_section), array('i', max_num_clients_section)[0]
+
+
+def process_test_case(total_num_clients, clients_preferences, ingredients, total_num_combos, checkpoint=None, resume=False, profiler=None):
 
     # Evaluate every combo
     max_num_clients = 0
-    max_combo = []
-    
-    total_num_ingredients = len(ingredients)
+    max_combo = 0
 
-    # Generate and evaluate every combo
+    # Counter and timer to help us keep track of how fast we're progressing
     combo_counter = 0
-    for num_choose in range(1, total_num_ingredients+1):
-        combos = list(combinations(ingredients, num_choose))
-        # Eg. combo = ('pineapple', 'basil', 'cheese', 'peppers')
-        for combo in combos:
-            #print(f'{combo=}')
-
-            # Counter to help us keep track of how fast we're progressing
-            combo_counter += 1
-            if (combo_counter % 1000) == 1:
-                print(f'Evaluating combo #{combo_counter}/{total_num_combos} ({trunc((combo_counter/total_num_combos)*100)}%)')
-            
-            num_clients = evaluate_combo(combo, clients_preferences, total_num_clients, max_num_clients)
+    start_time = last_progress_time = time.perf_counter()
+
+    sections = checkpoint.load() if checkpoint and resume else None
+    if sections:
+        combo_counter, max_combo, max_num_clients = load_combo_checkpoint(sections)
+        print(f'Resumed from checkpoint: {combo_counter} combos already evaluated, {max_num_clients=}')
+    elif resume:
+        print('No checkpoint to resume from, starting from the first combo')
+    resumed_combo_counter = combo_counter
+
+    # Generate and evaluate every combo
+    for chunk in generate_chunks(generate_combos(ingredients, combo_counter), COMBO_CHUNK_SIZE):
+        for combo_mask in chunk:
+            num_clients = evaluate_combo(combo_mask, clients_preferences, total_num_clients, max_num_clients)
             #print(f'Num clients for this combo: {num_clients}\n')
             if num_clients > max_num_clients:
                 max_num_clients = num_clients
-                max_combo = combo
+                max_combo = combo_mask
                 #print(f'Max num clients increased to {max_num_clients}\n')
                 #print(f'New max combo: {max_combo}')
-                
+
                 if max_num_clients == total_num_clients:
                     #print(f'Found the optimal combo -- stop looking\n')
+                    if profiler:
+                        profiler.count('combos_evaluated', chunk.index(combo_mask) + 1)
                     return max_combo, max_num_clients
 
+        combo_counter += len(chunk)
+        if profiler:
+            profiler.count('combos_evaluated', len(chunk))
+        now = time.perf_counter()
+        if now - last_progress_time >= PROGRESS_INTERVAL_SECONDS:
+            last_progress_time = now
+            print(f'Evaluated {combo_counter}/{total_num_combos} combos ({combo_counter*100//total_num_combos}%, {(combo_counter - resumed_combo_counter)/(now - start_time):.0f} combos/s)')
+        if checkpoint and checkpoint.is_due():
+            save_combo_checkpoint(checkpoint, combo_counter, max_combo, max_num_clients)
+
     return max_combo, max_num_clients
 
 # Execution
 
-input_file = sys.argv[1]
+parser = argparse.ArgumentParser(description='Find the best pizza by evaluating every combo of ingredients')
+parser.add_argument('input_file', type=Path)
+parser.add_argument('--output-dir', type=Path, default=Path(__file__).resolve().parent/'outputs'/'solution1')
+parser.add_argument('--resume', action='store_true', help='carry on from the last checkpoint of an interrupted run on this input')
+parser.add_argument('--checkpoint-interval', type=float, default=30, help='seconds between checkpoints')
+parser.add_argument('--profile', action='store_true', help='write a JSON report of counters and timers (eg. combos evaluated per second) to practice/profiles')
+parser.add_argument('--cprofile', action='store_true', help='with --profile, also save cProfile stats (eg. for snakeviz or a flamegraph)')
+args = parser.parse_args()
+profiler = Profiler() if args.profile else None
+profiles_folder = Path(__file__).resolve().parent/'profiles'
+
+input_file = args.input_file
 input_file_path = Path(input_file)
 
+# Ingredients are interned (see common.loader), and each client becomes a pair of bitmasks over ingredient ids (see pizza.py)
 # client_preferences = \
 # [
-#     {
-#         'likes': [],
-#         'dislikes': []
-#     },
-#     {
-#         'likes': [],
-#         'dislikes': []
-#     },
+#     (likes_mask, dislikes_mask),
+#     (likes_mask, dislikes_mask),
 # ]
-clients_preferences = []
-ingredients = set()
-
-with open(input_file, encoding='utf8') as f:
-    line = f.readline()
-    total_num_clients = int(line)
-    
-    for i in range(total_num_clients):
-        new_client = {'likes': [], 'dislikes': []}
-        new_client['likes'] = f.readline().split()[1:]
-        new_client['dislikes'] = f.readline().split()[1:]
-        clients_preferences.append(new_client)
-
-        ingredients.update(set(new_client['likes']), new_client['dislikes'])
+with timed(profiler, 'parse'):
+    data = load_pizza_input_cached(input_file)
+total_num_clients = data.num_clients
+clients_preferences = make_client_masks(data)
+ingredient_names = data.ingredients.names
+ingredients = range(len(ingredient_names))
 
 #pprint(f'{clients_preferences=}')
-print(f'{ingredients=}\n')
+print(f'{ingredient_names=}\n')
 
-# Number of combinations (choosing r items out of n items): n!/((n-r)!r!)
-total_num_combos = 0
+# Number of combinations (choosing r items out of n items): n!/((n-r)!r!), as an exact int
 total_num_ingredients = len(ingredients)
-for i in range(1, total_num_ingredients + 1):
-    total_num_combos += factorial(total_num_ingredients) / (factorial(total_num_ingredients - i) * factorial(i))
+total_num_combos = sum(comb(total_num_ingredients, i) for i in range(1, total_num_ingredients + 1))
 print(f'{total_num_combos=}')
 
-max_combo, max_num_clients = process_test_case(total_num_clients, clients_preferences, ingredients, total_num_combos)
-max_combo = sorted(max_combo)
+checkpoint_file = get_checkpoint_file(Path(__file__).resolve().parent/'checkpoints', input_file, b'PIZZ')
+checkpoint = Checkpoint(checkpoint_file, b'PIZZ', input_file, args.checkpoint_interval)
+process_test_case_args = (total_num_clients, clients_preferences, ingredients, total_num_combos, checkpoint, args.resume, profiler)
+# The report is still written if the run is interrupted, eg. with Ctrl+C on a long enumeration
+try:
+    with timed(profiler, 'evaluate_combos'):
+        if profiler and args.cprofile:
+            max_combo, max_num_clients = run_with_cprofile(profiles_folder/f'solution1_{input_file_path.name}.prof', process_test_case, *process_test_case_args)
+        else:
+            max_combo, max_num_clients = process_test_case(*process_test_case_args)
+finally:
+    if profiler:
+        profiler.write_report(profiles_folder/f'solution1_{input_file_path.name}.json')
+        print(f'Profile written to {profiles_folder}')
+checkpoint.remove()
+max_combo = sorted(mask_to_ingredients(max_combo, ingredient_names))
 
 # Write more intuitive output for our debugging
 print(f'{max_num_clients=}')
 print(f'{max_combo=}')
 
 # Write official, unintuitive output format to file
-output_elements = []
-output_elements.append(str(len(max_combo)))
-output_elements.extend(list(max_combo))
-output_str = ' '.join(output_elements)
-# print(output_str)
-output_folder = Path('outputs/solution1')
-output_folder.mkdir(parents=True, exist_ok=True)
-output_file = output_folder/input_file_path.name
-with output_file.open('w+') as f:
-    f.write(output_str)
\ No newline at end of file
+write_pizza_submission(args.output_dir/input_file_path.name, max_combo, data.ingredients.ids)
@@ -4,90 +4,97 @@
 #
 # Strategy: Binary Search Tree
 # 
-# Synopsis: Solution uses a binary tree to generate permutations of each customer's likes and dislikes, then uses tree leaf nodes to calculate sum for each permutation.
-#           Each leaf node represents a permutation with all of the ingredients considered, and contains a total count of the customer's that would be satisfied by this
-#           permutation. The leaf node with the highest sum is returned which always contains the optimal solution. This strategy is better than brute force as we only
-#           generate the combinations that would be possible for the list of customers and not every possible combination.
+# Synopsis: Solution uses a binary tree of include/exclude decisions over the ingredients that customers mention, then uses tree leaf nodes to calculate the sum for each
+#           permutation. Each leaf node represents a permutation with all of the ingredients considered, and the customers that would be satisfied by it. The leaf node
+#           with the highest sum is returned which always contains the optimal solution. The tree is walked depth-first and never stored, and branches that can't beat
+#           the best leaf so far are skipped, so only the current path is ever in memory.
 #
 
+import argparse
 from math import trunc
 from pathlib import Path
 import sys
 
-# Class represents the binary tree data structure used for the binary search tree algorithm
-class Node:
-    def __init__(self, data):
-        self.left = None
-        self.right = None
-        self.data = data
-
-    def get_next_node(self, right=False, left=False):
-        if right is True:
-            if self.right is None:
-                self.right = Node(0)
-            return self.right
-        elif left is True:
-            if self.left is None:
-                self.left = Node(0)
-            return self.left
-        else:
-            print("Left or Right Node was not specified in function call.")
-            raise
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.input_cache import load_pizza_input_cached
+from common.submission import write_pizza_submission
 
 # Functions
 
+# Walks the binary tree of include/exclude decisions depth-first, one mentioned ingredient per level (right = include, left = exclude), without ever storing it.
+# Each node is the bitmask of clients still consistent with the decisions above it, so a leaf's count is the number of clients its pizza satisfies, and memory
+# only grows with the depth of the current path instead of with the number of permutations.
 def process_test_case_with_binary_tree(clients_preferences, ingredients):
-    max_combo = []
-    max_num_clients = 0
     total_clients = len(clients_preferences)
-    # Initialize Tree
-    root = Node(0)
 
+    # Eg. liked_by[ingredient_id] = bitmask of the clients who like it. Ingredients nobody mentions don't change any count, so they get no level in the tree
+    liked_by = {}
+    disliked_by = {}
+    for c_num, client in enumerate(clients_preferences):
+        for i, preference in client.items():
+            preferences_by = liked_by if preference == 1 else disliked_by
+            preferences_by[i] = preferences_by.get(i, 0) | (1 << c_num)
+    levels = [(liked_by.get(i, 0), disliked_by.get(i, 0)) for i in ingredients if i in liked_by or i in disliked_by]
+
+    max_num_clients = 0
+    max_clients_mask = 0
+    num_leaves = 0
+    # Eg. (depth, clients_mask) -- levels[:depth] are decided, and clients_mask are the clients none of those decisions contradicted
+    stack = [(0, (1 << total_clients) - 1)]
+    while stack:
+        depth, clients_mask = stack.pop()
+
+        # Every leaf below this node counts a subset of these clients, so it can't beat the best leaf found so far
+        num_clients = clients_mask.bit_count()
+        if num_clients <= max_num_clients:
+            continue
+
+        # If none of the remaining clients disagree about an ingredient, the branch they agree on dominates the other one, so just follow it
+        while depth < len(levels):
+            liked, disliked = levels[depth]
+            if liked & clients_mask and disliked & clients_mask:
+                break
+            depth += 1
+
+        if depth == len(levels):
+            max_num_clients = num_clients
+            max_clients_mask = clients_mask
+            num_leaves += 1
+            # Print Progress
+            print(f'Leaf #{num_leaves}: {max_num_clients}/{total_clients} clients ({trunc((max_num_clients/total_clients)*100)}%)')
+            continue
+
+        stack.append((depth + 1, clients_mask & ~liked))
+        stack.append((depth + 1, clients_mask & ~disliked))
+
+    # Nobody left at the best leaf disagrees about anything, so its pizza is everything they like
+    max_combo = set()
     for c_num, client in enumerate(clients_preferences):
-        current_node = root
-        for i in ingredients:
-            # If Client has no preference on ingredient
-            if i not in client:
-                # Assume this version of the client likes the ingredient, and create a duplicate client that dislikes this ingredient
-                current_node = current_node.get_next_node(right=True)
-                client[i] = 1
-                new_client = client.copy()
-                new_client[i] = 0
-                clients_preferences.append(new_client)
-                total_clients += 1
-            else:
-                # If Client Likes Ingredient
-                if client[i] == 1:
-                    current_node = current_node.get_next_node(right=True)
-
-                # If Client Dislikes Ingredient
-                if client[i] == 0:
-                    current_node = current_node.get_next_node(left=True)
-
-        # Current node is currently leaf node. Now get value after incrementing for current customer and see if current combo is best
-        current_node.data += 1
-        if current_node.data > max_num_clients:
-            max_num_clients = current_node.data
-            max_combo = client
-
-        # Print Progress
-        if c_num % 100 == 1:
-            print(f'Evaluating clients #{c_num}/{total_clients} ({trunc((c_num/total_clients)*100)}%)')
-    
-    # Since max_combo is dictionary, we need to convert to list
-    combo = []
-    for key in max_combo:
-        # Only add ingredient if they like it
-        if max_combo[key] == 1:
-            combo.append(key)
-    max_combo = combo
-        
-    return max_combo, max_num_clients
+        if max_clients_mask >> c_num & 1:
+            max_combo.update(i for i, preference in client.items() if preference == 1)
+
+    return list(max_combo), max_num_clients
+
+
+# Peak resident memory of this process in MB, or None where the resource module isn't available (eg. Windows)
+def get_peak_rss_mb():
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in KB everywhere else
+    return peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+
 
 # Print final results and write result to file
-def print_results(max_combo, max_num_clients, strategy):
-    max_combo = sorted(max_combo)
+def print_results(max_combo, max_num_clients, strategy, output_folder):
     global input_file_path
+    global ingredient_names
+    max_combo = sorted(ingredient_names[i] for i in max_combo)
 
     # Write more intuitive output for our debugging
     print(f'{strategy=}')
@@ -95,48 +102,38 @@ def print_results(max_combo, max_num_clients, strategy):
     print(f'{sorted(max_combo)=}\n')
 
     # Write official, unintuitive output format to file
-    output_elements = []
-    output_elements.append(str(len(max_combo)))
-    output_elements.extend(list(max_combo))
-    output_str = ' '.join(output_elements)
-    
-    output_folder = Path(f'outputs\\{strategy}')
-    output_folder.mkdir(parents=True, exist_ok=True)
-    output_file = output_folder/(input_file_path.name)
-    with output_file.open('w+') as f:
-        f.write(output_str)
+    write_pizza_submission(Path(output_folder)/(input_file_path.name), max_combo)
 
 if __name__ == "__main__":
     # Execution
-    input_file = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Find the best pizza by walking a binary tree of ingredient decisions')
+    parser.add_argument('input_file', type=Path)
+    parser.add_argument('--output-dir', type=Path, default=Path(__file__).resolve().parent/'outputs'/'solution2')
+    args = parser.parse_args()
+
+    input_file = args.input_file
     global input_file_path
     input_file_path = Path(input_file)
 
+    # Ingredients are interned, so each client is keyed by ingredient id -- see common.loader
+    data = load_pizza_input_cached(input_file)
+    global ingredient_names
+    ingredient_names = data.ingredients.names
+
     clients_preferences = []
-    ingredients = set()
-
-    with open(input_file, encoding='utf8') as f:
-        line = f.readline()
-        total_num_clients = int(line)
-        
-        for i in range(total_num_clients):
-            new_client = {}
-
-            # Go through each liked and disliked ingredient, and add to customer preference.
-            # Like = 1, Dislike = 0
-            liked_ingredients = f.readline().split()[1:]
-            for like in liked_ingredients:
-                new_client[like] = 1
-            disliked_ingredients = f.readline().split()[1:]
-            for dislike in disliked_ingredients:
-                new_client[dislike] = 0
-            
-            clients_preferences.append(new_client)
-            ingredients.update(set(liked_ingredients), disliked_ingredients)
+    for i in range(data.num_clients):
+        # Go through each liked and disliked ingredient, and add to customer preference.
+        # Like = 1, Dislike = 0
+        new_client = dict.fromkeys(data.client_likes(i), 1)
+        new_client.update(dict.fromkeys(data.client_dislikes(i), 0))
+        clients_preferences.append(new_client)
 
     # Sort Ingredients Lexographically
-    ingredients = sorted(ingredients)
+    ingredients = sorted(range(len(ingredient_names)), key=ingredient_names.__getitem__)
 
     # Find best combination with clients and ingredients
     max_combo, max_num_clients = process_test_case_with_binary_tree(clients_preferences, ingredients)
-    print_results(max_combo, max_num_clients, "binary_tree")
\ No newline at end of file
+    print_results(max_combo, max_num_clients, "binary_tree", args.output_dir)
+
+    peak_rss_mb = get_peak_rss_mb()
+    print(f'Peak RSS: {peak_rss_mb:.1f} MB' if peak_rss_mb is not None else 'Peak RSS: not available on this platform')
\ No newline at end of file
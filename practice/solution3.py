@@ -0,0 +1,138 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Program to solve Google's Hash Code 2022 'Pizza' practice problem: https://codingcompetitions.withgoogle.com/hashcode/round/00000000008f5ca9/00000000008f6f33#problem
+#
+# Strategy: Client Conflict Graph + Maximum Independent Set
+#
+# Synopsis: Two clients conflict if one of them likes an ingredient the other dislikes -- no pizza can satisfy both. Any set of clients with no conflicts between
+#           them (an independent set in the conflict graph) is satisfied by the pizza made of all their likes, so the problem becomes finding a large independent set.
+#           We start from a greedy independent set (fewest conflicts first), then improve it with local search until the time budget runs out: add a random client
+#           and drop the clients it conflicts with, keeping the move if we lose at most one client (occasionally two, to get off plateaus). Sets of clients are
+#           bitmasks, so every move is a few big-int operations, and every new best pizza is written to the outputs folder as soon as it is found.
+#
+# Usage: python solution3.py <input_file> [time_budget_seconds] [--output-dir DIR]
+#
+
+import argparse
+from pathlib import Path
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.input_cache import load_pizza_input_cached
+from pizza import count_satisfied, iterate_bits, make_client_masks, make_ingredient_client_masks, make_pizza, write_pizza
+
+
+# Constants
+
+DEFAULT_TIME_BUDGET = 10
+# Don't rewrite the output file more often than this while the solution is still improving
+MIN_SECONDS_BETWEEN_WRITES = 1
+
+# Functions
+
+# Returns [conflicts_mask, ...] -- bit j of conflicts_mask[i] is set if clients i and j can't both be satisfied
+# liked_by and disliked_by are from make_ingredient_client_masks
+def make_conflict_graph(client_masks, liked_by, disliked_by):
+    conflicts = []
+    for client_id, (likes_mask, dislikes_mask) in enumerate(client_masks):
+        conflicts_mask = 0
+        for ingredient_id in iterate_bits(likes_mask):
+            conflicts_mask |= disliked_by[ingredient_id]
+        for ingredient_id in iterate_bits(dislikes_mask):
+            conflicts_mask |= liked_by[ingredient_id]
+        conflicts.append(conflicts_mask & ~(1 << client_id))
+    return conflicts
+
+
+# Greedy independent set: take clients with the fewest conflicts first
+def make_greedy_selection(conflicts, rng):
+    order = sorted(range(len(conflicts)), key=lambda client_id: (conflicts[client_id].bit_count(), rng.random()))
+    selected = 0
+    blocked = 0
+    for client_id in order:
+        if not (blocked >> client_id) & 1:
+            selected |= 1 << client_id
+            blocked |= conflicts[client_id]
+    return selected
+
+
+def improve_selection(selected, conflicts, rng, deadline, on_improvement):
+    num_clients = len(conflicts)
+    current_size = best_size = selected.bit_count()
+    best_selected = selected
+    num_moves = 0
+
+    while True:
+        # Only check the clock every so often -- it costs more than a move
+        if num_moves % 1000 == 0 and time.perf_counter() >= deadline:
+            break
+        num_moves += 1
+
+        client_id = rng.randrange(num_clients)
+        client_bit = 1 << client_id
+        if selected & client_bit:
+            continue
+
+        num_dropped = (selected & conflicts[client_id]).bit_count()
+        # Keep improving and sideways moves, and very occasionally lose one client to get off a plateau
+        if num_dropped <= 1 or (num_dropped == 2 and rng.random() < 0.001):
+            selected = (selected & ~conflicts[client_id]) | client_bit
+            current_size += 1 - num_dropped
+            if current_size > best_size:
+                best_size, best_selected = current_size, selected
+                on_improvement(best_selected)
+
+    return best_selected, num_moves
+
+
+def process_test_case_with_conflict_graph(client_masks, num_ingredients, time_budget, on_improvement):
+    start_time = time.perf_counter()
+    rng = random.Random(0)
+
+    liked_by, disliked_by = make_ingredient_client_masks(client_masks, num_ingredients)
+    conflicts = make_conflict_graph(client_masks, liked_by, disliked_by)
+    selected = make_greedy_selection(conflicts, rng)
+    print(f'Greedy: {selected.bit_count()} clients after {time.perf_counter() - start_time:.1f}s')
+    on_improvement(selected)
+
+    selected, num_moves = improve_selection(selected, conflicts, rng, start_time + time_budget, on_improvement)
+    print(f'Local search: {num_moves} moves')
+
+    max_combo = make_pizza(selected, client_masks)
+    return max_combo, count_satisfied(liked_by, disliked_by, len(client_masks), max_combo)
+
+
+if __name__ == "__main__":
+    # Execution
+    parser = argparse.ArgumentParser(description='Find a good pizza with a conflict graph local search, within a time budget')
+    parser.add_argument('input_file', type=Path)
+    parser.add_argument('time_budget', type=float, nargs='?', default=DEFAULT_TIME_BUDGET, help='seconds')
+    parser.add_argument('--output-dir', type=Path, default=Path(__file__).resolve().parent/'outputs'/'solution3')
+    args = parser.parse_args()
+
+    input_file_path = args.input_file
+    time_budget = args.time_budget
+
+    data = load_pizza_input_cached(input_file_path)
+    ingredient_names = data.ingredients.names
+    client_masks = make_client_masks(data)
+
+    output_file = args.output_dir/input_file_path.name
+
+    # Stream each new best pizza to the output file, so stopping early still leaves a good answer behind
+    last_write_time = None
+    def on_improvement(selected):
+        global last_write_time
+        now = time.perf_counter()
+        if last_write_time is None or now - last_write_time >= MIN_SECONDS_BETWEEN_WRITES:
+            write_pizza(output_file, make_pizza(selected, client_masks), ingredient_names)
+            last_write_time = now
+            print(f'New best: {selected.bit_count()} clients')
+
+    max_combo, max_num_clients = process_test_case_with_conflict_graph(client_masks, len(ingredient_names), time_budget, on_improvement)
+    write_pizza(output_file, max_combo, ingredient_names)
+
+    # Write more intuitive output for our debugging
+    print(f'{max_num_clients=}')
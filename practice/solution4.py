@@ -0,0 +1,149 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Program to solve Google's Hash Code 2022 'Pizza' practice problem: https://codingcompetitions.withgoogle.com/hashcode/round/00000000008f5ca9/00000000008f6f33#problem
+#
+# Strategy: Branch and Bound (exact)
+#
+# Synopsis: Depth-first search over include/exclude decisions, one ingredient at a time, keeping a bitmask of the clients that are still 'alive' (not yet
+#           contradicted by a decision). Including an ingredient kills everyone who dislikes it, and excluding it kills everyone who likes it.
+#           Only 'contested' ingredients -- liked by one alive client and disliked by another -- need a decision: once none are left, the pizza made of all the alive
+#           clients' likes satisfies every one of them. The number of alive clients, less the clients the remaining decisions are sure to kill, is an upper bound on
+#           anything below a node, so a subtree is pruned as soon as it can't beat the best pizza found so far. Ingredients are ordered by conflict degree, and each
+#           node branches on the one that tightens the bound the most. Alive masks that were already expanded are skipped, since they lead to the same subtree.
+#           The search is seeded with the greedy answer from solution3, and when it finishes the answer is a proven optimum.
+#
+# Usage: python solution4.py <input_file> [num_clients] [--output-dir DIR]
+#   num_clients only keeps the first num_clients clients, eg. to get a provable answer on a trimmed version of 'd'
+#
+
+import argparse
+from pathlib import Path
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.input_cache import load_pizza_input_cached
+from pizza import count_satisfied, make_client_masks, make_ingredient_client_masks, make_pizza, write_pizza
+from solution3 import make_conflict_graph, make_greedy_selection
+
+
+# Constants
+
+# Stop remembering new states past this many, so the memo can't eat all the memory on big inputs (the search stays exact, it just prunes less)
+MAX_MEMO_SIZE = 2_000_000
+PROGRESS_INTERVAL_SECONDS = 5
+
+# Functions
+
+# Contested ingredients, most conflicted first. Eg. [(liked_by_mask, disliked_by_mask), ...]
+def order_ingredients_by_conflicts(liked_by, disliked_by):
+    contested = [(liked, disliked) for liked, disliked in zip(liked_by, disliked_by) if liked and disliked]
+    contested.sort(key=lambda masks: masks[0].bit_count() * masks[1].bit_count(), reverse=True)
+    return contested
+
+
+# Returns (num_losses, branch_liked, branch_disliked) for the ingredients in decisions, already restricted to the alive clients.
+# num_losses is a lower bound on how many alive clients the remaining decisions must kill: each contested ingredient kills all of its alive likers or all of
+# its alive dislikers, so at least the smaller group, and only counting clients not already counted for an earlier ingredient keeps the groups disjoint, so the
+# losses add up. The branch ingredient is the one whose smaller group is biggest, since deciding it brings the bound down the most.
+def examine_decisions(decisions):
+    num_losses = 0
+    counted = 0
+    branch_liked = branch_disliked = 0
+    branch_size = 0
+    for liked, disliked in decisions:
+        num_liked, num_disliked = liked.bit_count(), disliked.bit_count()
+        smaller = num_liked if num_liked < num_disliked else num_disliked
+        if smaller > branch_size:
+            branch_liked, branch_disliked, branch_size = liked, disliked, smaller
+
+        liked &= ~counted
+        disliked &= ~counted
+        if liked and disliked:
+            num_liked, num_disliked = liked.bit_count(), disliked.bit_count()
+            num_losses += num_liked if num_liked < num_disliked else num_disliked
+            counted |= liked | disliked
+    return num_losses, branch_liked, branch_disliked
+
+
+def process_test_case_with_branch_and_bound(client_masks, num_ingredients):
+    start_time = time.perf_counter()
+    last_progress_time = start_time
+
+    liked_by, disliked_by = make_ingredient_client_masks(client_masks, num_ingredients)
+    decisions = order_ingredients_by_conflicts(liked_by, disliked_by)
+
+    best_alive = make_greedy_selection(make_conflict_graph(client_masks, liked_by, disliked_by), random.Random(0))
+    max_num_clients = best_alive.bit_count()
+    print(f'{len(decisions)} contested ingredients, greedy lower bound: {max_num_clients} clients')
+
+    # Every decision kills one side of a contested ingredient, so which ingredients are still contested only depends on who's alive -- and so does the whole
+    # subtree below a node, which is what makes alive masks safe to memoize
+    visited = set()
+    num_nodes = 0
+    # Eg. (alive_mask, decisions) -- alive_mask are the clients no decision so far contradicted, and decisions are the ingredients that were still contested
+    # for the parent node, most conflicted first
+    stack = [((1 << len(client_masks)) - 1, decisions)]
+    while stack:
+        alive, decisions = stack.pop()
+        num_nodes += 1
+        if num_nodes % 10000 == 0 and time.perf_counter() - last_progress_time >= PROGRESS_INTERVAL_SECONDS:
+            last_progress_time = time.perf_counter()
+            print(f'{num_nodes=} {max_num_clients=} memo={len(visited)} ({last_progress_time - start_time:.0f}s)')
+
+        # Upper bound: every alive client satisfied
+        num_alive = alive.bit_count()
+        if num_alive <= max_num_clients or alive in visited:
+            continue
+        if len(visited) < MAX_MEMO_SIZE:
+            visited.add(alive)
+
+        # Drop the decisions that no longer contradict anyone alive
+        decisions = [(liked & alive, disliked & alive) for liked, disliked in decisions if liked & alive and disliked & alive]
+        if not decisions:
+            best_alive = alive
+            max_num_clients = num_alive
+            continue
+
+        num_losses, liked, disliked = examine_decisions(decisions)
+        if num_alive - num_losses <= max_num_clients:
+            continue
+
+        # Include (kill the dislikers) or exclude (kill the likers) -- push the one keeping more clients alive last, so it's explored first
+        include_alive = alive & ~disliked
+        exclude_alive = alive & ~liked
+        if include_alive.bit_count() >= exclude_alive.bit_count():
+            stack.append((exclude_alive, decisions))
+            stack.append((include_alive, decisions))
+        else:
+            stack.append((include_alive, decisions))
+            stack.append((exclude_alive, decisions))
+
+    print(f'Search finished: {num_nodes=} in {time.perf_counter() - start_time:.1f}s')
+    max_combo = make_pizza(best_alive, client_masks)
+    return max_combo, count_satisfied(liked_by, disliked_by, len(client_masks), max_combo)
+
+
+if __name__ == "__main__":
+    # Execution
+    parser = argparse.ArgumentParser(description='Find a proven optimal pizza with branch and bound')
+    parser.add_argument('input_file', type=Path)
+    parser.add_argument('num_clients', type=int, nargs='?', default=None, help='only keep the first num_clients clients')
+    parser.add_argument('--output-dir', type=Path, default=Path(__file__).resolve().parent/'outputs'/'solution4')
+    args = parser.parse_args()
+
+    input_file_path = args.input_file
+    num_clients = args.num_clients
+
+    data = load_pizza_input_cached(input_file_path)
+    ingredient_names = data.ingredients.names
+    client_masks = make_client_masks(data)[:num_clients]
+
+    max_combo, max_num_clients = process_test_case_with_branch_and_bound(client_masks, len(ingredient_names))
+
+    # Write more intuitive output for our debugging
+    print(f'Proven optimum: {max_num_clients=}')
+
+    output_name = input_file_path.name if num_clients is None else f'{input_file_path.name}.first{num_clients}'
+    write_pizza(args.output_dir/output_name, max_combo, ingredient_names)
@@ -0,0 +1,501 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Local search that improves a schedule for Google's 2022 HashCode Problem, starting from the greedy simulator in solution.py
+#
+#  Synopsis:
+#   Moves: swap two projects that are close together in the schedule, give one role of a project to a different person, add a project that isn't scheduled yet,
+#          or drop a scheduled project.
+#   Acceptance: late acceptance hill climbing -- a move is kept if it doesn't lower the score (so sideways moves are kept too, which lets the search drift across
+#               plateaus), or if the score it leads to is at least as good as the score we had 'history' iterations ago.
+#
+#   Delta evaluation: each scheduled project is a ScheduledProject holding its result (days, score, level ups) and a sort key, and every person has their projects
+#   and their level ups in key order, so their free day and level just before any point of the schedule is a bisect. Keys leave gaps between projects, so
+#   inserting or dropping a project only touches its own contributors' lists, never the positions of everything after it.
+#   A move only changes the people on the projects it touches, so it is scored by replaying those projects, then walking forward through the later projects
+#   of 'dirty' people only. A dirty person's state is kept as the difference from the current schedule: their free day, and a level offset per skill (eg. -1 in
+#   C++ for a level up they no longer get). A later project is only re-scored if one of its contributors has a different free day, or an offset in one of
+#   its skills. A person is clean again once their free day matches and they have no offsets left.
+#   Accepting a move writes back just the results that changed during its evaluation.
+#
+#  Usage: python qualifying/local_search.py <input_file> [--start OUTPUT_FILE] [--time SECONDS] [--seed N] [--output-dir DIR]
+#
+
+import argparse
+from bisect import bisect_left, bisect_right, insort
+import heapq
+from itertools import count
+from operator import attrgetter
+from pathlib import Path
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.input_cache import load_qualifying_input_cached
+from common.submission import write_qualifying_submission
+from scorer import project_score, read_input_file, read_output_file, score_schedule
+from solution import PROJECT_ORDERINGS, build_problem, get_schedule, schedule_projects
+
+
+# Gap between the keys of neighbouring projects when keys are (re)numbered, ie. room to insert projects between them before the keys run out
+KEY_GAP = 1 << 32
+GET_KEY = attrgetter('key')
+# Random picks tried per role when looking for someone qualified
+PICK_ATTEMPTS = 10
+# Qualified people compared per pick
+CANDIDATES_PER_PICK = 3
+INF = float('inf')
+
+
+# Score one project under the official rules, reading state through get_level(name, skill_name) and get_free_day(name).
+# Returns (start_day, end_day, score, [(name, skill_name) that level up]), or None if a contributor isn't qualified.
+def evaluate_project(project, contributors, get_level, get_free_day):
+    duration, score, best_before, roles = project
+    level_ups = []
+
+    for name, (skill_name, required_skill_level) in zip(contributors, roles):
+        skill_level = get_level(name, skill_name)
+        if skill_level < required_skill_level:
+            if skill_level < required_skill_level - 1:
+                return None
+            if not any(get_level(mentor, skill_name) >= required_skill_level for mentor in contributors if mentor != name):
+                return None
+        if skill_level <= required_skill_level:
+            level_ups.append((name, skill_name))
+
+    start_day = max(get_free_day(name) for name in contributors)
+    end_day = start_day + duration
+    return start_day, end_day, project_score(score, best_before, end_day), level_ups
+
+
+class ScheduledProject:
+    def __init__(self, project_name, contributors, key):
+        self.project_name = project_name
+        self.contributors = contributors
+        # Projects run in key order
+        self.key = key
+        self.start_day = self.end_day = self.score = 0
+        # Eg. [('Anna', 'C++')]
+        self.level_ups = []
+
+    def set_result(self, result):
+        self.start_day, self.end_day, self.score, self.level_ups = result
+
+
+class IndexedSchedule:
+    def __init__(self, people_skills, projects, schedule):
+        self.people_skills = people_skills
+        self.names = list(people_skills)
+        self.projects = projects
+        # In schedule order
+        self.entries = [ScheduledProject(project_name, list(contributors), (i + 1) * KEY_GAP) for i, (project_name, contributors) in enumerate(schedule)]
+        # Eg. {'WebServer': ScheduledProject}
+        self.scheduled = {}
+        # Eg. {'Anna': [Anna's ScheduledProjects]} and {('Anna', 'C++'): [ScheduledProjects where Anna levels up C++]}, in key order
+        self.person_entries = {}
+        self.level_up_entries = {}
+        self.total_score = 0
+        # Eg. {'WebServer': (duration, score, best_before, roles)} -- parsed once each, rather than on every lookup into projects
+        self.parsed_projects = {}
+        # (move, delta, results of the move's new projects, [(later ScheduledProject, new result), ...]) from the last evaluate_move, for apply_move
+        self.last_evaluation = None
+
+        # Replay the whole schedule once
+        skills = {}
+        free_day = {}
+
+        def get_level(name, skill_name):
+            if name not in skills:
+                skills[name] = dict(self.people_skills[name])
+            return skills[name].get(skill_name, 0)
+
+        for position, entry in enumerate(self.entries):
+            result = evaluate_project(self.get_project(entry.project_name), entry.contributors, get_level, lambda name: free_day.get(name, 0))
+            if result is None:
+                raise ValueError(f'Project {entry.project_name} at position {position} has an unqualified contributor')
+            entry.set_result(result)
+            for name in entry.contributors:
+                free_day[name] = entry.end_day
+            for name, skill_name in entry.level_ups:
+                skills[name][skill_name] = get_level(name, skill_name) + 1
+            self.add_entry(entry)
+
+    def get_project(self, project_name):
+        project = self.parsed_projects.get(project_name)
+        if project is None:
+            project = self.parsed_projects[project_name] = self.projects[project_name]
+        return project
+
+    def add_entry(self, entry):
+        self.scheduled[entry.project_name] = entry
+        self.total_score += entry.score
+        for name in entry.contributors:
+            insort(self.person_entries.setdefault(name, []), entry, key=GET_KEY)
+        self.add_level_ups(entry)
+
+    def remove_entry(self, entry):
+        del self.scheduled[entry.project_name]
+        self.total_score -= entry.score
+        for name in entry.contributors:
+            remove_sorted(self.person_entries[name], entry)
+        self.remove_level_ups(entry)
+
+    def add_level_ups(self, entry):
+        for name, skill_name in entry.level_ups:
+            insort(self.level_up_entries.setdefault((name, skill_name), []), entry, key=GET_KEY)
+
+    def remove_level_ups(self, entry):
+        for name, skill_name in entry.level_ups:
+            remove_sorted(self.level_up_entries[(name, skill_name)], entry)
+
+    # Day name is free, just before key
+    def free_day_before(self, name, key):
+        person_entries = self.person_entries.get(name, ())
+        i = bisect_left(person_entries, key, key=GET_KEY)
+        return person_entries[i - 1].end_day if i else 0
+
+    # Level name has in skill_name, just before key
+    def level_before(self, name, skill_name, key):
+        return self.people_skills[name].get(skill_name, 0) + bisect_left(self.level_up_entries.get((name, skill_name), ()), key, key=GET_KEY)
+
+    # Score change from replacing the num_replaced projects starting at position start with new_entries ([(project name, contributors), ...]),
+    # or None if that makes the schedule invalid
+    def evaluate_move(self, start, num_replaced, new_entries):
+        entries = self.entries
+        end = start + num_replaced
+        # New projects go in where the replaced ones were: after everything before start_key, and before end_key
+        start_key = entries[start].key if start < len(entries) else INF
+        end_key = entries[end].key if end < len(entries) else INF
+
+        # State of the dirty people -- eg. {'Anna': day Anna is free}, {'Anna': day Anna is free in the current schedule}, {'Anna': {'C++': -1}}
+        free_day = {}
+        original_free_day = {}
+        offsets = {}
+
+        def make_dirty(name, new_free_day, current_free_day):
+            if name not in free_day:
+                free_day[name] = new_free_day
+                original_free_day[name] = current_free_day
+                offsets[name] = {}
+
+        def add_offset(name, skill_name, amount):
+            person_offsets = offsets[name]
+            offset = person_offsets.get(skill_name, 0) + amount
+            if offset:
+                person_offsets[skill_name] = offset
+            else:
+                del person_offsets[skill_name]
+
+        # Eg. [(next key, tie breaker, ScheduledProject)] -- the next later project of each dirty person
+        pending = []
+        tie_breaker = count()
+
+        # Carry on with name's next project after key, or forget them if they are back in sync with the current schedule
+        def advance(name, key):
+            if free_day[name] == original_free_day[name] and not offsets[name]:
+                del free_day[name], original_free_day[name], offsets[name]
+                return
+            person_entries = self.person_entries.get(name, ())
+            i = bisect_right(person_entries, key, key=GET_KEY)
+            if i < len(person_entries):
+                heapq.heappush(pending, (person_entries[i].key, next(tie_breaker), person_entries[i]))
+
+        # Everyone on the replaced projects or the new ones starts dirty, as of just after the changed window, and loses the level ups of the replaced projects
+        delta = 0
+        for entry in entries[start:end]:
+            delta -= entry.score
+            for name in entry.contributors:
+                make_dirty(name, self.free_day_before(name, start_key), self.free_day_before(name, end_key))
+            for name, skill_name in entry.level_ups:
+                add_offset(name, skill_name, -1)
+        for project_name, contributors in new_entries:
+            for name in contributors:
+                make_dirty(name, self.free_day_before(name, start_key), self.free_day_before(name, end_key))
+
+        new_results = []
+        get_level = lambda name, skill_name: self.level_before(name, skill_name, end_key) + offsets[name].get(skill_name, 0)
+        for project_name, contributors in new_entries:
+            result = evaluate_project(self.get_project(project_name), contributors, get_level, free_day.__getitem__)
+            if result is None:
+                return None
+            start_day, end_day, score, level_ups = result
+            for name in contributors:
+                free_day[name] = end_day
+            for name, skill_name in level_ups:
+                add_offset(name, skill_name, 1)
+            delta += score
+            new_results.append(result)
+
+        # Keys are ints, so the first project after end_key - 1 is the first one at or after end_key
+        for name in list(free_day):
+            advance(name, end_key - 1)
+
+        changes = []
+        last_key = None
+        while pending:
+            key, i, entry = heapq.heappop(pending)
+            # Several dirty people can share a project
+            if key == last_key:
+                continue
+            last_key = key
+
+            project = self.get_project(entry.project_name)
+            contributors = entry.contributors
+            end_day = entry.end_day
+            if any(name in free_day and (free_day[name] != original_free_day[name] or any(skill_name in offsets[name] for skill_name, required_skill_level in project[3]))
+                   for name in contributors):
+                result = evaluate_project(project, contributors,
+                                          lambda name, skill_name: self.level_before(name, skill_name, key) + (offsets[name].get(skill_name, 0) if name in offsets else 0),
+                                          lambda name: free_day[name] if name in free_day else self.free_day_before(name, key))
+                if result is None:
+                    return None
+                start_day, end_day, score, level_ups = result
+                delta += score - entry.score
+                if end_day != entry.end_day or level_ups != entry.level_ups:
+                    changes.append((entry, result))
+                    # Contributors who were in sync until now are dirty from here on
+                    for name in contributors:
+                        make_dirty(name, end_day, entry.end_day)
+                    for name, skill_name in entry.level_ups:
+                        add_offset(name, skill_name, -1)
+                    for name, skill_name in level_ups:
+                        add_offset(name, skill_name, 1)
+
+            for name in contributors:
+                if name in free_day:
+                    free_day[name] = end_day
+                    original_free_day[name] = entry.end_day
+                    advance(name, key)
+
+        self.last_evaluation = ((start, num_replaced, new_entries), delta, new_results, changes)
+        return delta
+
+    # Apply a move that was just scored by evaluate_move, writing back only what changed
+    def apply_move(self, start, num_replaced, new_entries):
+        if self.last_evaluation is None or self.last_evaluation[0] != (start, num_replaced, new_entries):
+            if self.evaluate_move(start, num_replaced, new_entries) is None:
+                raise ValueError('Move makes the schedule invalid')
+        move, delta, new_results, changes = self.last_evaluation
+        self.last_evaluation = None
+
+        end = start + num_replaced
+        for entry in self.entries[start:end]:
+            self.remove_entry(entry)
+        for entry, result in changes:
+            self.remove_level_ups(entry)
+            self.total_score -= entry.score
+            entry.set_result(result)
+            self.total_score += entry.score
+            self.add_level_ups(entry)
+
+        added = [ScheduledProject(project_name, list(contributors), None) for project_name, contributors in new_entries]
+        self.entries[start:end] = added
+        low_key = self.entries[start - 1].key if start else 0
+        high_key = self.entries[start + len(added)].key if start + len(added) < len(self.entries) else low_key + KEY_GAP * (len(added) + 1)
+        step = (high_key - low_key) // (len(added) + 1)
+        if added and not step:
+            self.renumber()
+        else:
+            for i, entry in enumerate(added):
+                entry.key = low_key + step * (i + 1)
+        for entry, result in zip(added, new_results):
+            entry.set_result(result)
+            self.add_entry(entry)
+
+    # Respace every key KEY_GAP apart -- only needed once some gap has been split all the way down. Every list stays sorted, since the order doesn't change.
+    def renumber(self):
+        for i, entry in enumerate(self.entries):
+            entry.key = (i + 1) * KEY_GAP
+
+    def get_schedule(self):
+        return [(entry.project_name, list(entry.contributors)) for entry in self.entries]
+
+
+# Remove entry from a list sorted by key
+def remove_sorted(entries, entry):
+    del entries[bisect_left(entries, entry.key, key=GET_KEY)]
+
+
+# Swap the project at a random position with one up to max_distance positions later
+def make_swap_move(indexed_schedule, rng, max_distance):
+    num_projects = len(indexed_schedule.entries)
+    if num_projects < 2:
+        return None
+    i = rng.randrange(num_projects - 1)
+    j = min(num_projects - 1, i + rng.randint(1, max_distance))
+    entries = [(entry.project_name, entry.contributors) for entry in indexed_schedule.entries[i:j + 1]]
+    entries[0], entries[-1] = entries[-1], entries[0]
+    return i, len(entries), entries
+
+
+# Eg. {'C++': ([1, 2, 2, 5], ['Anna', 'Bob', 'Maria', 'Nick'])} -- everyone with each skill in the input, sorted by level
+def make_skill_holders(people_skills):
+    skill_holders = {}
+    for name, person_skills in people_skills.items():
+        for skill_name, skill_level in person_skills.items():
+            skill_holders.setdefault(skill_name, []).append((skill_level, name))
+
+    for skill_name, holders in skill_holders.items():
+        holders.sort()
+        skill_holders[skill_name] = ([skill_level for skill_level, name in holders], [name for skill_level, name in holders])
+    return skill_holders
+
+
+# Person who isn't in contributors and has at least min_level in skill_name just before key (ie. counting the level ups they have had by then), or None.
+# Of the first few random people who qualify, the one who is free soonest, so that the project isn't held up waiting for one busy person.
+def pick_skill_holder(indexed_schedule, skill_holders, rng, skill_name, min_level, key, contributors):
+    # Eg. a mentee for a level 1 role -- everyone has level 0
+    if min_level <= 0:
+        levels, names = (), indexed_schedule.names
+    elif skill_name in skill_holders:
+        levels, names = skill_holders[skill_name]
+    else:
+        return None
+    # Anyone who started with min_level still has it, so try them first. Everyone else in the skill might have levelled up to it by key.
+    first = bisect_left(levels, min_level)
+
+    best_name, best_free_day = None, INF
+    num_candidates = 0
+    for attempt in range(PICK_ATTEMPTS):
+        name = names[rng.randrange(first if first < len(names) and attempt < PICK_ATTEMPTS // 2 else 0, len(names))]
+        if name not in contributors and (min_level <= 0 or indexed_schedule.level_before(name, skill_name, key) >= min_level):
+            free_day = indexed_schedule.free_day_before(name, key)
+            if free_day < best_free_day:
+                best_name, best_free_day = name, free_day
+            num_candidates += 1
+            if num_candidates == CANDIDATES_PER_PICK:
+                break
+    return best_name
+
+
+# Pick someone for a role of a team being built (None in contributors for roles not filled yet): fully qualified, or one level short if someone on the team can
+# already mentor them
+def pick_role_holder(indexed_schedule, skill_holders, rng, skill_name, required_skill_level, key, contributors):
+    has_mentor = any(name is not None and indexed_schedule.level_before(name, skill_name, key) >= required_skill_level for name in contributors)
+    return pick_skill_holder(indexed_schedule, skill_holders, rng, skill_name, required_skill_level - 1 if has_mentor else required_skill_level, key, contributors)
+
+
+# Give a random role of a random project to someone else who could fill it
+def make_reassign_move(indexed_schedule, rng, skill_holders):
+    if not indexed_schedule.entries:
+        return None
+    position = rng.randrange(len(indexed_schedule.entries))
+    entry = indexed_schedule.entries[position]
+    project_name, contributors = entry.project_name, entry.contributors
+    role = rng.randrange(len(contributors))
+    skill_name, required_skill_level = indexed_schedule.get_project(project_name)[3][role]
+
+    new_contributors = list(contributors)
+    new_contributors[role] = None
+    name = pick_role_holder(indexed_schedule, skill_holders, rng, skill_name, required_skill_level, entry.key, new_contributors)
+    if name is None or name in contributors:
+        return None
+    new_contributors[role] = name
+    return position, 1, [(project_name, new_contributors)]
+
+
+# Add a random unscheduled project at a random position, with a random team of people who are qualified for its roles by then -- or one level short, with
+# a mentor already on the team
+def make_insert_move(indexed_schedule, rng, skill_holders, project_names):
+    project_name = rng.choice(project_names)
+    if project_name in indexed_schedule.scheduled:
+        return None
+
+    position = rng.randint(0, len(indexed_schedule.entries))
+    key = indexed_schedule.entries[position].key if position < len(indexed_schedule.entries) else INF
+    contributors = []
+    for skill_name, required_skill_level in indexed_schedule.get_project(project_name)[3]:
+        name = pick_role_holder(indexed_schedule, skill_holders, rng, skill_name, required_skill_level, key, contributors)
+        if name is None:
+            return None
+        contributors.append(name)
+
+    return position, 0, [(project_name, contributors)]
+
+
+# Drop a random project, eg. a late one that is holding its contributors up
+def make_remove_move(indexed_schedule, rng):
+    if not indexed_schedule.entries:
+        return None
+    return rng.randrange(len(indexed_schedule.entries)), 1, []
+
+
+def local_search(indexed_schedule, time_budget, rng, history_length=1000, max_distance=5):
+    skill_holders = make_skill_holders(indexed_schedule.people_skills)
+
+    project_names = list(indexed_schedule.projects)
+
+    current_score = indexed_schedule.total_score
+    best_score, best_schedule = current_score, indexed_schedule.get_schedule()
+    history = [current_score] * history_length
+    # Draws are every attempt to make a move, and moves are the ones that made it to evaluate_move (eg. not an insert of a project that's already scheduled)
+    num_draws = num_moves = num_accepted = 0
+
+    start_time = time.perf_counter()
+    deadline = start_time + time_budget
+    while True:
+        # Only check the clock every so often -- it costs more than evaluating a small move
+        if num_draws % 100 == 0 and time.perf_counter() >= deadline:
+            break
+
+        move_type = rng.random()
+        if move_type < 0.4:
+            move = make_swap_move(indexed_schedule, rng, max_distance)
+        elif move_type < 0.7:
+            move = make_reassign_move(indexed_schedule, rng, skill_holders)
+        elif move_type < 0.95:
+            move = make_insert_move(indexed_schedule, rng, skill_holders, project_names)
+        else:
+            move = make_remove_move(indexed_schedule, rng)
+        num_draws += 1
+        if move is None:
+            continue
+        num_moves += 1
+
+        delta = indexed_schedule.evaluate_move(*move)
+        history_index = num_moves % history_length
+        if delta is not None and (delta >= 0 or current_score + delta >= history[history_index]):
+            indexed_schedule.apply_move(*move)
+            current_score += delta
+            num_accepted += 1
+            if current_score > best_score:
+                best_score, best_schedule = current_score, indexed_schedule.get_schedule()
+        history[history_index] = current_score
+
+    elapsed = time.perf_counter() - start_time
+    print(f'{num_moves} moves evaluated in {elapsed:.1f}s ({num_moves / max(elapsed, 1e-9):.0f} moves/s), {num_accepted} accepted, {num_draws - num_moves} draws gave no move')
+    return best_score, best_schedule
+
+
+# Greedy schedule from solution.py, as [(project name, [contributor names]), ...]
+def get_greedy_schedule(input_file, strategy):
+    people, projects, skill_index = build_problem(load_qualifying_input_cached(input_file))
+    return get_schedule(schedule_projects(people, projects, skill_index, PROJECT_ORDERINGS[strategy], verbose=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Improve a qualifying schedule with late acceptance hill climbing')
+    parser.add_argument('input_file', type=Path)
+    parser.add_argument('--start', type=Path, help='output file to start from (defaults to a fresh greedy schedule)')
+    parser.add_argument('--strategy', choices=list(PROJECT_ORDERINGS), default='value', help='ordering for the greedy starting schedule')
+    parser.add_argument('--time', type=float, default=60, help='wall clock budget in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', type=Path, default=Path(__file__).resolve().parent/'outputs')
+    args = parser.parse_args()
+
+    people_skills, projects = read_input_file(args.input_file)
+    start_schedule = read_output_file(args.start) if args.start else get_greedy_schedule(args.input_file, args.strategy)
+    indexed_schedule = IndexedSchedule(people_skills, projects, start_schedule)
+    start_score = indexed_schedule.total_score
+    print(f'Starting score {start_score}')
+
+    best_score, best_schedule = local_search(indexed_schedule, args.time, random.Random(args.seed))
+
+    # Check delta evaluation against a full replay before trusting it
+    total_score, results = score_schedule(people_skills, projects, best_schedule)
+    if total_score != best_score:
+        print(f'Warning: local search expected a score of {best_score}, but scorer gave {total_score}')
+    print(f'Best score {total_score} ({total_score - start_score:+})')
+
+    if total_score > start_score:
+        write_qualifying_submission(args.output_dir/args.input_file.name, best_schedule)
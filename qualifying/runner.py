@@ -0,0 +1,126 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Portfolio runner for Google's 2022 HashCode Problem -- solves every input under several project orderings and seeds in parallel, and keeps the best output per input
+#
+#  Synopsis:
+#   Each (input, strategy, seed) job runs the simulator from solution.py in a worker process. Inputs are parsed once in this process and handed to each worker when
+#   it starts, and each worker builds the people/projects/skill index for an input once and reuses them for every job on that input.
+#   Seed 0 runs the plain ordering; other seeds break ties in the ordering at random. With --matching, every job staffs projects with the scarcity-weighted matching.
+#   An output file is only replaced when the new schedule beats the score of the one already there.
+#
+#  Usage: python qualifying/runner.py [input_file ...] [--strategies value deadline ...] [--seeds N] [--workers N] [--matching] [--output-dir DIR]
+#   With no input files, every file in qualifying/inputs is solved.
+#
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import random
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.input_cache import load_qualifying_input_cached
+from common.submission import write_qualifying_submission
+from scorer import read_input_file, read_output_file, score_schedule
+from solution import PROJECT_ORDERINGS, build_problem, check_score, get_schedule, schedule_projects
+
+
+# Eg. {'a_an_example.in.txt': QualifyingInput} -- set once per worker process by init_worker
+worker_inputs = {}
+# Eg. {'a_an_example.in.txt': (people, projects, skill_index)} -- built the first time a worker gets a job for that input
+worker_problems = {}
+
+
+def init_worker(inputs):
+    global worker_inputs
+    worker_inputs = inputs
+
+
+def run_job(input_name, strategy, seed, matching=False):
+    if input_name not in worker_problems:
+        worker_problems[input_name] = build_problem(worker_inputs[input_name])
+    people, projects, skill_index = worker_problems[input_name]
+
+    rng = random.Random(seed) if seed else None
+    fully_scheduled_projects = schedule_projects(people, projects, skill_index, PROJECT_ORDERINGS[strategy], rng, verbose=False, matching=matching)
+    score = check_score(people, projects, fully_scheduled_projects, verbose=False)
+
+    return input_name, strategy, seed, score, get_schedule(fully_scheduled_projects)
+
+
+# Score of the output already saved for input_file, or -1 if there isn't a valid one
+def get_saved_score(input_file, output_file):
+    if not output_file.exists():
+        return -1
+    try:
+        people_skills, projects = read_input_file(input_file)
+        total_score, results = score_schedule(people_skills, projects, read_output_file(output_file))
+    except (ValueError, IndexError):
+        return -1
+    return total_score
+
+
+def format_summary(input_names, strategies, best_scores, saved):
+    header = ['input'] + strategies + ['best', 'saved']
+    rows = [header]
+    for input_name in input_names:
+        row = [input_name]
+        row.extend(str(best_scores.get((input_name, strategy), '-')) for strategy in strategies)
+        row.append(str(max(best_scores[(input_name, strategy)] for strategy in strategies)))
+        row.append('yes' if saved[input_name] else 'no')
+        rows.append(row)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows]
+    return '\n'.join(lines) + '\n'
+
+
+def main(input_files, strategies, num_seeds, num_workers, output_folder, matching=False):
+    inputs = {input_file.name: load_qualifying_input_cached(input_file) for input_file in input_files}
+
+    # Biggest inputs first, so the long jobs don't end up running alone at the end
+    jobs = [(input_file.name, strategy, seed) for input_file in sorted(input_files, key=lambda path: path.stat().st_size, reverse=True) for strategy in strategies for seed in range(num_seeds)]
+
+    # Eg. {'a_an_example.in.txt': (score, strategy, seed, schedule)}
+    best_results = {}
+    # Eg. {('a_an_example.in.txt', 'value'): best score over all seeds}
+    best_scores = {}
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=init_worker, initargs=(inputs,)) as executor:
+        futures = [executor.submit(run_job, *job, matching) for job in jobs]
+        for future in as_completed(futures):
+            input_name, strategy, seed, score, schedule = future.result()
+            print(f'{input_name} {strategy=} {seed=} {score=}')
+            best_scores[(input_name, strategy)] = max(score, best_scores.get((input_name, strategy), -1))
+            if input_name not in best_results or score > best_results[input_name][0]:
+                best_results[input_name] = (score, strategy, seed, schedule)
+
+    output_folder.mkdir(parents=True, exist_ok=True)
+    saved = {}
+    for input_file in input_files:
+        score, strategy, seed, schedule = best_results[input_file.name]
+        output_file = output_folder/input_file.name
+        saved[input_file.name] = score > get_saved_score(input_file, output_file)
+        if saved[input_file.name]:
+            data = inputs[input_file.name]
+            project_num_roles = {project_name: data.project_role_start[i + 1] - data.project_role_start[i] for i, project_name in enumerate(data.project_names)}
+            write_qualifying_submission(output_file, schedule, project_num_roles, set(data.person_names))
+
+    summary = format_summary([input_file.name for input_file in input_files], strategies, best_scores, saved)
+    print(summary)
+    (output_folder/'summary.txt').write_text(summary, encoding='utf8')
+
+
+if __name__ == "__main__":
+    qualifying_folder = Path(__file__).resolve().parent
+
+    parser = argparse.ArgumentParser(description='Solve qualifying inputs under several strategies in parallel, keeping the best output for each input')
+    parser.add_argument('input_files', nargs='*', type=Path, help='defaults to every file in qualifying/inputs')
+    parser.add_argument('--strategies', nargs='+', choices=list(PROJECT_ORDERINGS), default=list(PROJECT_ORDERINGS))
+    parser.add_argument('--seeds', type=int, default=1, help='number of seeds per strategy (seed 0 is the plain ordering)')
+    parser.add_argument('--workers', type=int, default=None, help='defaults to one per core')
+    parser.add_argument('--matching', action='store_true', help='staff projects with the scarcity-weighted matching instead of greedily (see solution.py)')
+    parser.add_argument('--output-dir', type=Path, default=qualifying_folder/'outputs')
+    args = parser.parse_args()
+
+    input_files = args.input_files or sorted((qualifying_folder/'inputs').glob('*.txt'))
+    main(input_files, args.strategies, args.seeds, args.workers, args.output_dir, args.matching)
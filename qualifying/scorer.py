@@ -0,0 +1,158 @@
+#
+# Authors: Pranav Marla and Nick Quinn
+# Description: Official scoring rules for Google's 2022 HashCode Problem -- replays a submission against its input file and reports the score
+#
+#  Synopsis:
+#   Projects are replayed in submission order. Each one starts on the first day all of its contributors are free, and finishes 'duration' days later.
+#   Score of a project = its score, minus one point for every day it finishes after its best before day (but never below zero).
+#   Mentoring: a role can be filled by someone one level short, as long as another contributor on the project has the required level for that skill.
+#   Level up: when a project finishes, every contributor whose level was <= the required level of their role gains one level in that skill.
+#
+#  Usage: python qualifying/scorer.py <input_file> <output_file> [--breakdown]
+#
+
+from pathlib import Path
+import sys
+
+
+class ProjectResult:
+    def __init__(self, name, start_day, end_day, score):
+        self.name = name
+        self.start_day = start_day
+        self.end_day = end_day
+        self.score = score
+
+
+# Projects from an input file, decoded from its tokens only when looked up -- a submission usually schedules a small fraction of the projects, so there is no point building them all
+class InputProjects:
+    def __init__(self, tokens, positions):
+        self.tokens = tokens
+        # Eg. {'WebServer': index of 'WebServer' in tokens}
+        self.positions = positions
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    # Eg. (duration, score, best_before, [('HTML', 3), ('C++', 2)])
+    def __getitem__(self, name):
+        tokens = self.tokens
+        pos = self.positions[name]
+        end = pos + 5 + 2*int(tokens[pos + 4])
+        return int(tokens[pos + 1]), int(tokens[pos + 2]), int(tokens[pos + 3]), list(zip(tokens[pos + 5:end:2], map(int, tokens[pos + 6:end:2])))
+
+
+def read_input_file(input_file):
+    # Read the whole file at once and slice its tokens -- much faster than one readline() per line on the large inputs
+    with open(input_file, encoding='utf8') as f:
+        tokens = f.read().split()
+
+    num_people, num_projects = int(tokens[0]), int(tokens[1])
+    pos = 2
+
+    # Eg. {'Anna': {'C++': 2}}
+    people_skills = {}
+    for i in range(num_people):
+        name, num_skills = tokens[pos], int(tokens[pos + 1])
+        end = pos + 2 + 2*num_skills
+        people_skills[name] = dict(zip(tokens[pos + 2:end:2], map(int, tokens[pos + 3:end:2])))
+        pos = end
+
+    positions = {}
+    for i in range(num_projects):
+        positions[tokens[pos]] = pos
+        pos += 5 + 2*int(tokens[pos + 4])
+
+    return people_skills, InputProjects(tokens, positions)
+
+
+def read_output_file(output_file):
+    with open(output_file, encoding='utf8') as f:
+        lines = f.read().splitlines()
+
+    # Eg. [('WebServer', ['Bob', 'Anna']), ...]
+    schedule = []
+    num_projects = int(lines[0])
+    for i in range(num_projects):
+        schedule.append((lines[2*i + 1].strip(), lines[2*i + 2].split()))
+
+    return schedule
+
+
+def project_score(score, best_before, end_day):
+    # Lose a point for every day late, but never go negative
+    return max(0, score - max(0, end_day - best_before))
+
+
+# Replay schedule and return (total score, [ProjectResult, ...]). Raises ValueError if the schedule breaks a rule.
+def score_schedule(people_skills, projects, schedule):
+    # Copy skills, since contributors level up as the schedule is replayed
+    skills = {name: dict(person_skills) for name, person_skills in people_skills.items()}
+    # Eg. {'Anna': first day Anna is free}
+    free_day = dict.fromkeys(people_skills, 0)
+    scheduled_projects = set()
+    results = []
+    total_score = 0
+
+    for project_name, contributors in schedule:
+        if project_name not in projects:
+            raise ValueError(f'Unknown project {project_name}')
+        if project_name in scheduled_projects:
+            raise ValueError(f'Project {project_name} is scheduled more than once')
+        scheduled_projects.add(project_name)
+
+        duration, score, best_before, roles = projects[project_name]
+        if len(contributors) != len(roles):
+            raise ValueError(f'Project {project_name} has {len(roles)} roles but {len(contributors)} contributors')
+        for name in contributors:
+            if name not in skills:
+                raise ValueError(f'Unknown contributor {name} on project {project_name}')
+        if len(set(contributors)) != len(contributors):
+            raise ValueError(f'Project {project_name} has the same contributor in several roles')
+
+        level_ups = []
+        for name, (skill_name, required_skill_level) in zip(contributors, roles):
+            skill_level = skills[name].get(skill_name, 0)
+            if skill_level < required_skill_level:
+                # Only one level short is allowed, and only with a mentor on the project
+                has_mentor = any(skills[mentor].get(skill_name, 0) >= required_skill_level for mentor in contributors if mentor != name)
+                if skill_level < required_skill_level - 1 or not has_mentor:
+                    raise ValueError(f'{name} is not qualified for {skill_name} level {required_skill_level} on project {project_name}')
+            if skill_level <= required_skill_level:
+                level_ups.append((name, skill_name))
+
+        start_day = max(free_day[name] for name in contributors)
+        end_day = start_day + duration
+        for name in contributors:
+            free_day[name] = end_day
+        for name, skill_name in level_ups:
+            skills[name][skill_name] = skills[name].get(skill_name, 0) + 1
+
+        result = ProjectResult(project_name, start_day, end_day, project_score(score, best_before, end_day))
+        results.append(result)
+        total_score += result.score
+
+    return total_score, results
+
+
+def print_score(total_score, results, breakdown=False):
+    if breakdown:
+        for result in results:
+            print(f'{result.name}: days {result.start_day}-{result.end_day}, score {result.score}')
+    print(f'{len(results)} projects, total score {total_score}')
+
+
+if __name__ == "__main__":
+    input_file = sys.argv[1]
+    output_file = sys.argv[2]
+    breakdown = '--breakdown' in sys.argv[3:]
+
+    people_skills, projects = read_input_file(Path(input_file))
+    schedule = read_output_file(Path(output_file))
+    total_score, results = score_schedule(people_skills, projects, schedule)
+    print_score(total_score, results, breakdown)
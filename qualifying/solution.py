@@ -2,15 +2,20 @@
 # Authors: Pranav Marla and Nick Quinn
 # Description: Program to solve Google's 2022 HashCode Problem
 #
-# Strategies
-#   - 
+# Strategies (project orderings, see PROJECT_ORDERINGS)
+#   - value: score still available today / duration
+#   - deadline: earliest best before day first
+#   - score: highest score still available today first
+#   - roles: fewest roles first
+# Staffing: greedy by default (lowest qualified person per role), or with --matching a min-cost matching of roles to people that saves scarce experts
+#   for the projects still waiting (see assign_to_project_with_matching)
 # 
 #  Synopsis:
 #  Timeline: Start 12:45 AM, Ends 4:30 PM
 #  Steps:
 #   1. Given a project, find contributors that will fill all the roles
 #      Data Structures
-#      skill[tool_name] = min-heap of people with skill
+#      skill_index[tool_name] = sorted skill levels, each with a bitmask of the people at that level
 #      people[name] = person_class
 #   2. Sort project based on value (score/duration) Note: If score is tied, pick project smaller duration or earlier due date
 #
@@ -20,221 +25,792 @@ Psuedo Code
 Step 1: 
 
 for skill in project
-    pull min person off of tool min heap
-    check if person is qualified
-        yes? assign to skill in project
-        no? pull next person off and add to list of people needed to add back for next project
-            (*before adding people back, wait till next project to add back onto min-heap*)
+    bisect tool's sorted levels for the first level that is qualified
+    for each level from there upwards
+        AND the people at that level with the people who are available
+        anyone left? assign the lowest one to skill in project
 
 '''
 
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right, insort
 import heapq
+from itertools import islice
 from pathlib import Path
 import sys
-
-# Global Variables
-global all_assigned_workers
-all_assigned_workers = []
-global day
-day = 0
-
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.checkpoint import Checkpoint, get_checkpoint_file
+from common.input_cache import load_qualifying_input_cached
+from common.profiling import Profiler, run_with_cprofile, timed
+from common.submission import write_qualifying_submission
+from scorer import print_score, project_score, score_schedule
+
+# People x skills matrix of skill levels, stored row by row in one flat array -- eg. levels[person_id * num_skills + skill_id]
+class SkillMatrix:
+    def __init__(self, data):
+        self.num_skills = len(data.skills)
+        # 'h' => 2 byte levels, leaving plenty of room for level ups
+        self.levels = array('h', bytes(2 * data.num_people * self.num_skills))
+        for person_id in range(data.num_people):
+            offset = person_id * self.num_skills
+            for skill_id, skill_level in data.person_skills(person_id):
+                self.levels[offset + skill_id] = skill_level
+        # Levels as given in the input, before any level ups from mentoring
+        self.initial_levels = array('h', self.levels)
+
+# Thin view of one row of the SkillMatrix
 class Person:
-    def __init__(self, name, skills):
-        self.name = name
-        # Eg. {'C++': 3, 'Python': 4}
-        self.skills = skills
-
-    def get_skill_level(self, skill_name):
-        # Return skill level or assume skill is zero if missing
-        return self.skills.get(skill_name, 0)
+    __slots__ = ('id', 'name', 'levels', 'initial_levels', 'offset', 'skills', 'initial_skills', 'busy_until')
 
-    # When two people in heap have same skill level (first element of each tuple), heap will move on to second element of each tuple , which is the Person object itself. Thus, heap needs a way to do the "<" operation for two Person objects to decide which is "lesser" -- currently, we just pick the first one.
-    def __lt__(self, other):
-        return True
-
-class Project:
-    def __init__(self, name, duration, score, best_before, num_of_roles, skills):
+    def __init__(self, person_id, name, skill_matrix, skill_ids):
+        # Position of this person in the input, used as their row in the skill matrix and their bit in the skill index's bitmasks
+        self.id = person_id
         self.name = name
-        self.duration = duration
-        self.score = score
-        self.best_before = best_before
-        self.num_of_roles = num_of_roles
-        # [('C++', required_level), ...]
-        self.skills = skills
+        self.levels = skill_matrix.levels
+        self.initial_levels = skill_matrix.initial_levels
+        self.offset = person_id * skill_matrix.num_skills
+        # Eg. [skill_id, ...] -- skills this person has a level in (see common.loader for skill ids)
+        self.skills = list(skill_ids)
+        self.initial_skills = tuple(skill_ids)
+        # First day this person is free to start a new project
+        self.busy_until = 0
+
+    def get_skill_level(self, skill_id):
+        # Missing skills are zero in the matrix
+        return self.levels[self.offset + skill_id]
+
+    def get_initial_skill_level(self, skill_id):
+        return self.initial_levels[self.offset + skill_id]
+
+    def set_skill_level(self, skill_id, skill_level):
+        if skill_level > 0 and not self.get_skill_level(skill_id):
+            self.skills.append(skill_id)
+        elif skill_level == 0 and self.get_skill_level(skill_id):
+            self.skills.remove(skill_id)
+        self.levels[self.offset + skill_id] = skill_level
+
+# Thin view of one project from the input, whose roles stay in the input's CSR role table rather than being copied into per-project lists
+class Project:
+    __slots__ = ('id', 'name', 'duration', 'score', 'best_before', 'data', 'assigned_workers', 'start_day', 'level_ups', 'queued')
+
+    def __init__(self, project_id, data):
+        self.id = project_id
+        self.name = data.project_names[project_id]
+        self.duration = data.project_durations[project_id]
+        self.score = data.project_scores[project_id]
+        self.best_before = data.project_best_befores[project_id]
+        self.data = data
         self.assigned_workers = []
+        self.start_day = None
+        # [(Person, skill_id), ...] -- workers whose level in that skill goes up by one when this project finishes
+        self.level_ups = []
+        # Whether this project is currently waiting in the ProjectQueue
+        self.queued = False
+
+    # Eg. iterates (skill_id, required_level), ...
+    @property
+    def skills(self):
+        data = self.data
+        start, end = data.project_role_start[self.id], data.project_role_start[self.id + 1]
+        return zip(data.project_role_skill_ids[start:end], data.project_role_levels[start:end])
+
+    @property
+    def num_of_roles(self):
+        return self.data.project_role_start[self.id + 1] - self.data.project_role_start[self.id]
+
+    def end_day(self):
+        return self.start_day + self.duration
     
-    def calculate_value(self):
-        # We define value of a project as its 'score' divided by its duration. However, we want the heap to give us the project with the max value, but Python's implementation is a min heap -- thus, make the value negative to force it to effectively behave like a max heap.
-        return -1 * (self.score / self.duration)
-    
-    # When two projects in heap have same value, deadline, etc., currently we just pick the first poject and tell heap that is the "lesser" one
-    def __lt__(self, other):
-        return True
+    # Score this project would earn if it started on day, after losing a point per day late
+    def score_if_started(self, day):
+        return max(0, self.score - max(0, day + self.duration - self.best_before))
+
+    def calculate_value(self, day):
+        # We define value of a project as the score it would earn if started today, divided by its duration. However, we want the heap to give us the project with the max value, but Python's implementation is a min heap -- thus, make the value negative to force it to effectively behave like a max heap.
+        return -1 * (self.score_if_started(day) / self.duration)
+
+    # Days only move forward, so once a project can't earn anything it never will again
+    def is_dead(self, day):
+        return self.score_if_started(day) == 0
+
+class SkillIndex:
+    def __init__(self, people):
+        self.people = people
+        # Bit i is set while people[i] is free to start a new project
+        self.available_mask = (1 << len(people)) - 1
+        # Eg. {skill_id: [1, 3, 5]} -- distinct levels that someone has for this skill, kept sorted so they can be bisected
+        self.skill_levels = {}
+        # Eg. {skill_id: {1: 0b0101, 3: 0b1000, 5: 0b0010}} -- bitmask of the people with exactly this level
+        self.skill_level_masks = {}
+        # Eg. {skill_id: [0b1111, 0b1010, 0b0010]} -- entry i is the bitmask of the people with level >= skill_levels[skill_id][i], so 'who is qualified' is a single lookup
+        self.skill_at_least_masks = {}
+
+        for person in people:
+            for skill_name in person.skills:
+                self.add_person(person, skill_name, person.get_skill_level(skill_name))
+        for skill_name in self.skill_levels:
+            self.update_at_least_masks(skill_name)
+
+    def add_person(self, person, skill_name, skill_level):
+        level_masks = self.skill_level_masks.setdefault(skill_name, {})
+        if skill_level not in level_masks:
+            insort(self.skill_levels.setdefault(skill_name, []), skill_level)
+            level_masks[skill_level] = 0
+        level_masks[skill_level] |= 1 << person.id
+
+    def update_at_least_masks(self, skill_name):
+        level_masks = self.skill_level_masks[skill_name]
+        at_least_masks = []
+        people_mask = 0
+        for skill_level in reversed(self.skill_levels[skill_name]):
+            people_mask |= level_masks[skill_level]
+            at_least_masks.append(people_mask)
+        at_least_masks.reverse()
+        self.skill_at_least_masks[skill_name] = at_least_masks
+
+    # Bitmask of everyone (busy or not) with at least skill_level in this skill
+    def get_qualified_mask(self, skill_name, skill_level):
+        levels = self.skill_levels.get(skill_name)
+        if levels is None:
+            return 0
+        i = bisect_left(levels, skill_level)
+        return self.skill_at_least_masks[skill_name][i] if i < len(levels) else 0
+
+    # Move person to new_skill_level (0 removes the skill), eg. after they level up from a project
+    def update_skill_level(self, person, skill_name, new_skill_level):
+        old_skill_level = person.get_skill_level(skill_name)
+        if old_skill_level == new_skill_level:
+            return
+
+        if old_skill_level > 0:
+            level_masks = self.skill_level_masks[skill_name]
+            level_masks[old_skill_level] &= ~(1 << person.id)
+            if not level_masks[old_skill_level]:
+                del level_masks[old_skill_level]
+                self.skill_levels[skill_name].remove(old_skill_level)
+
+        if new_skill_level > 0:
+            self.add_person(person, skill_name, new_skill_level)
+        person.set_skill_level(skill_name, new_skill_level)
+        self.update_at_least_masks(skill_name)
+
+    def mark_busy(self, person):
+        self.available_mask &= ~(1 << person.id)
+
+    def mark_available(self, person):
+        self.available_mask |= 1 << person.id
+
+    # Find the lowest skilled available person who meets the required level, ignoring anyone in excluded_mask (eg. people already assigned to the project). Nothing is popped or copied, so a failed lookup leaves the index untouched.
+    def find_min_person(self, skill_name, required_skill_level, excluded_mask):
+        levels = self.skill_levels.get(skill_name)
+        if levels is None:
+            return None
+
+        level_masks = self.skill_level_masks[skill_name]
+        candidates_mask = self.available_mask & ~excluded_mask
+        for skill_level in islice(levels, bisect_left(levels, required_skill_level), None):
+            people_mask = level_masks[skill_level] & candidates_mask
+            if people_mask:
+                # Lowest set bit => first person in input order at this level
+                return self.people[(people_mask & -people_mask).bit_length() - 1]
+
+        return None
+
+    # Batched feasibility check over all of a project's roles at once, so that hopeless projects are thrown out before any per-role assignment is attempted.
+    # Optimistic -- a project that passes may still fail the greedy assignment, but one that fails can never be staffed today:
+    #   - every role needs an available person at the full required level (a mentor for the role would have to have that level anyway)
+    #   - there must be at least as many distinct available candidates, counting mentees one level short, as there are roles
+    def is_project_feasible(self, project):
+        available_mask = self.available_mask
+        candidates_mask = 0
+        for skill_name, required_skill_level in project.skills:
+            if not self.get_qualified_mask(skill_name, required_skill_level) & available_mask:
+                return False
+            candidates_mask |= self.get_qualified_mask(skill_name, required_skill_level - 1) & available_mask
+
+        return candidates_mask.bit_count() >= project.num_of_roles
+
+# Check if mentor is available for this skill, ie. someone already assigned to the project has the required level
+def check_for_mentor(assigned_mask, skill_index, skill_name, required_skill_level):
+    return (assigned_mask & skill_index.get_qualified_mask(skill_name, required_skill_level)) != 0
+
+def assign_to_project(project, skill_index, day):
+
+    if not skill_index.is_project_feasible(project):
+        return [], False
 
-# Iterative function to find min person
-def find_min_person(available_people, required_skill_level, people_not_in_heap, skill_name):
+    assigned_workers = []
+    # Bitmask of assigned_workers, so they are not picked again for another role on this project
+    assigned_mask = 0
 
-    if skill_name not in people_not_in_heap:
-        people_not_in_heap[skill_name] = []
+    for skill_name, project_required_skill_level in project.skills:
+        required_skill_level = project_required_skill_level
+        # If mentor available, then lower skill level by one
+        if check_for_mentor(assigned_mask, skill_index, skill_name, required_skill_level):
+            required_skill_level -= 1
 
-    while len(available_people) != 0:
-        # Pop lowest skilled worker, and check if their skill meets requirements.
-        min_person = heapq.heappop(available_people)[1]
-        people_not_in_heap[skill_name].append(min_person)
+        min_person = skill_index.find_min_person(skill_name, required_skill_level, assigned_mask)
+        if min_person is None:
+            return [], False
 
-        if (min_person.get_skill_level(skill_name) >= required_skill_level) and not next((p for p, d in all_assigned_workers if p == min_person), False):
-            return min_person, people_not_in_heap, available_people
-    
-    return None, people_not_in_heap, available_people
+        assigned_workers.append(min_person)
+        assigned_mask |= 1 << min_person.id
+
+    start_assigned_workers(project, assigned_workers, skill_index, day)
+    return assigned_workers, True
 
-# Check if mentor is available for this skill
-def check_for_mentor(assigned_workers, skill_name, required_skill_level):
-    for w in assigned_workers:
-        if w.get_skill_level(skill_name) >= required_skill_level:
-            return True
-    return False
 
-# Reinsert People back into heap
-def reinsert_people_back_in_heap(project, skill_heap_tree, people_not_in_heap):
+# assigned_workers[i] fills the i'th role of project
+def start_assigned_workers(project, assigned_workers, skill_index, day):
+    level_ups = []
+    for w, (skill_name, project_required_skill_level) in zip(assigned_workers, project.skills):
+        # Worker learns from any role that stretches them, ie. whose original required level is >= their own
+        if w.get_skill_level(skill_name) <= project_required_skill_level:
+            level_ups.append((w, skill_name))
+
+    for w in assigned_workers:
+        w.busy_until = day + project.duration
+        skill_index.mark_busy(w)
+    project.level_ups = level_ups
+
+
+# Matching mode (see assign_to_project_with_matching)
+#   Rather than taking the lowest qualified person for each role in turn, the roles of a project are staffed together as a min-cost bipartite matching of roles
+#   to people. A person's cost is how much the projects still waiting would miss them: for each of their skills, every waiting role they could fill counts
+#   1 / (number of people who could fill it), so an expert that only a handful of people can stand in for is expensive, and someone whose skills are common is cheap.
+
+# Candidates considered per role, at each of full level and mentee level, lowest levels first -- keeps each matching small
+MATCHING_CANDIDATES_PER_ROLE = 6
+# Tie breakers on top of the scarcity cost: prefer the closest level, and prefer mentees (they level up, and save a qualified person for later)
+MATCHING_LEVEL_GAP_COST = 0.01
+MATCHING_MENTEE_BONUS = 0.05
+
+class ExpertScarcity:
+    def __init__(self, waiting_projects, skill_index):
+        self.skill_index = skill_index
+        # Eg. {skill_id: {required_level: number of waiting roles}}
+        self.role_counts = {}
+        for project in waiting_projects:
+            for skill_name, required_skill_level in project.skills:
+                counts = self.role_counts.setdefault(skill_name, {})
+                counts[required_skill_level] = counts.get(required_skill_level, 0) + 1
+        # Eg. {skill_id: (at least masks it was built from, sorted required levels, running total of role values up to each level)} -- the supply counts only
+        # change when someone in the skill levels up, which replaces the skill's at least masks, so a table is stale exactly when those are no longer the same list
+        self.tables = {}
+
+    def remove_project(self, project):
+        for skill_name, required_skill_level in project.skills:
+            counts = self.role_counts[skill_name]
+            counts[required_skill_level] -= 1
+            if not counts[required_skill_level]:
+                del counts[required_skill_level]
+            self.tables.pop(skill_name, None)
+
+    def get_table(self, skill_name):
+        at_least_masks = self.skill_index.skill_at_least_masks.get(skill_name)
+        table = self.tables.get(skill_name)
+        if table is None or table[0] is not at_least_masks:
+            counts = self.role_counts.get(skill_name, {})
+            required_skill_levels = sorted(counts)
+            running_values = []
+            total_value = 0
+            for required_skill_level in required_skill_levels:
+                total_value += counts[required_skill_level] / max(1, self.skill_index.get_qualified_mask(skill_name, required_skill_level).bit_count())
+                running_values.append(total_value)
+            table = (at_least_masks, required_skill_levels, running_values)
+            self.tables[skill_name] = table
+        return table
+
+    # How much the waiting projects would miss this person
+    def get_person_cost(self, person):
+        cost = 0
+        for skill_name in person.skills:
+            at_least_masks, required_skill_levels, running_values = self.get_table(skill_name)
+            i = bisect_right(required_skill_levels, person.get_skill_level(skill_name))
+            if i:
+                cost += running_values[i - 1]
+        return cost
+
+
+# Up to limit available people with a level in [min_skill_level, max_skill_level], lowest levels first
+def get_role_candidates(skill_index, skill_name, min_skill_level, max_skill_level, limit):
+    levels = skill_index.skill_levels.get(skill_name)
+    if levels is None:
+        return []
+
+    candidates = []
+    level_masks = skill_index.skill_level_masks[skill_name]
+    for skill_level in islice(levels, bisect_left(levels, min_skill_level), None):
+        if skill_level > max_skill_level:
+            break
+        people_mask = level_masks[skill_level] & skill_index.available_mask
+        while people_mask and len(candidates) < limit:
+            low_bit = people_mask & -people_mask
+            candidates.append(skill_index.people[low_bit.bit_length() - 1])
+            people_mask ^= low_bit
+        if len(candidates) >= limit:
+            break
+    return candidates
+
+
+# Min-cost assignment of every row to a distinct column (Hungarian algorithm with potentials, O(rows^2 * columns)). costs[row][column] is float('inf') where
+# a row can't take a column. Returns the column for each row, or None if there is no assignment that avoids every forbidden pair.
+def solve_assignment(costs):
+    inf = float('inf')
+    num_rows, num_columns = len(costs), len(costs[0])
+    if num_rows > num_columns:
+        return None
+
+    # 1-indexed, with column 0 as the 'unmatched' sentinel
+    row_potentials = [0] * (num_rows + 1)
+    column_potentials = [0] * (num_columns + 1)
+    column_rows = [0] * (num_columns + 1)
+    previous_columns = [0] * (num_columns + 1)
+    for row in range(1, num_rows + 1):
+        column_rows[0] = row
+        column = 0
+        min_slack = [inf] * (num_columns + 1)
+        used = [False] * (num_columns + 1)
+        while True:
+            used[column] = True
+            current_row = column_rows[column]
+            row_costs = costs[current_row - 1]
+            row_potential = row_potentials[current_row]
+            delta = inf
+            next_column = 0
+            for j in range(1, num_columns + 1):
+                if not used[j]:
+                    slack = row_costs[j - 1] - row_potential - column_potentials[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        previous_columns[j] = column
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        next_column = j
+            if delta == inf:
+                return None
+            for j in range(num_columns + 1):
+                if used[j]:
+                    row_potentials[column_rows[j]] += delta
+                    column_potentials[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            column = next_column
+            if column_rows[column] == 0:
+                break
+        while column:
+            previous_column = previous_columns[column]
+            column_rows[column] = column_rows[previous_column]
+            column = previous_column
+
+    assignment = [0] * num_rows
+    for j in range(1, num_columns + 1):
+        if column_rows[j]:
+            assignment[column_rows[j] - 1] = j - 1
+    return assignment
+
+
+# Same contract as assign_to_project, but staffs all the roles at once as a min-cost matching weighted by ExpertScarcity. A mentee (one level short) only counts if
+# someone else on the project has the full level, in any role, so the matching is re-solved without any mentee pairing that ended up with no mentor.
+# Falls back to the greedy assign_to_project if the candidates can't cover every role.
+def assign_to_project_with_matching(project, skill_index, day, scarcity):
+    if not skill_index.is_project_feasible(project):
+        return [], False
+
+    inf = float('inf')
+    roles = list(project.skills)
+    # Eg. {Person: column}
+    columns = {}
+    # Eg. [[(column, is_mentee, level gap), ...] for each role]
+    role_edges = []
+    for skill_name, required_skill_level in roles:
+        edges = []
+        for person in get_role_candidates(skill_index, skill_name, required_skill_level, inf, MATCHING_CANDIDATES_PER_ROLE):
+            edges.append((columns.setdefault(person, len(columns)), False, person.get_skill_level(skill_name) - required_skill_level))
+        for person in get_role_candidates(skill_index, skill_name, required_skill_level - 1, required_skill_level - 1, MATCHING_CANDIDATES_PER_ROLE):
+            edges.append((columns.setdefault(person, len(columns)), True, 0))
+        role_edges.append(edges)
+
+    people = list(columns)
+    person_costs = [scarcity.get_person_cost(person) for person in people]
+    costs = []
+    for edges in role_edges:
+        row_costs = [inf] * len(people)
+        for column, is_mentee, level_gap in edges:
+            row_costs[column] = person_costs[column] - MATCHING_MENTEE_BONUS if is_mentee else person_costs[column] + MATCHING_LEVEL_GAP_COST * level_gap
+        costs.append(row_costs)
+
+    # Each pass forbids at least one more mentee pairing, so this ends after at most one pass per role
+    for i in range(len(roles) + 1):
+        assignment = solve_assignment(costs)
+        if assignment is None:
+            return assign_to_project(project, skill_index, day)
+
+        assigned_workers = [people[column] for column in assignment]
+        assigned_mask = 0
+        for worker in assigned_workers:
+            assigned_mask |= 1 << worker.id
+        unmentored_roles = [role for role, ((skill_name, required_skill_level), worker) in enumerate(zip(roles, assigned_workers))
+                            if worker.get_skill_level(skill_name) < required_skill_level and not check_for_mentor(assigned_mask, skill_index, skill_name, required_skill_level)]
+        if not unmentored_roles:
+            break
+        for role in unmentored_roles:
+            costs[role][assignment[role]] = inf
+    else:
+        return assign_to_project(project, skill_index, day)
+
+    start_assigned_workers(project, assigned_workers, skill_index, day)
+    return assigned_workers, True
+
+
+# Project orderings for the ProjectQueue -- the project with the lowest key is tried first
+def order_by_value(project, day):
+    return project.calculate_value(day)
+
+def order_by_deadline(project, day):
+    return project.best_before
+
+def order_by_score(project, day):
+    return -project.score_if_started(day)
+
+def order_by_num_roles(project, day):
+    return project.num_of_roles
+
+PROJECT_ORDERINGS = {
+    'value': order_by_value,
+    'deadline': order_by_deadline,
+    'score': order_by_score,
+    'roles': order_by_num_roles,
+}
+
+
+# Priority queue of the projects worth trying today, best first by ordering (ties => earlier best before, then random if rng is given, then input order).
+# A project's key is only recalculated when it is pushed, ie. when something it depends on has changed: a worker with one of its skills was released, so it is worth trying again on a new day.
+# Projects that fail to be staffed are not pushed back, so they cost nothing until they are woken up again.
+class ProjectQueue:
+    def __init__(self, ordering=order_by_value, rng=None):
+        self.ordering = ordering
+        self.rng = rng
+        # Eg. [(Ordering Key, Project Best Before, Random Tie Break, Project Id, Project Class Object), ...]
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, project, day):
+        if project.queued:
+            return
+        project.queued = True
+        tie_break = self.rng.random() if self.rng else 0
+        heapq.heappush(self.heap, (self.ordering(project, day), project.best_before, tie_break, project.id, project))
+
+    def pop(self):
+        project = heapq.heappop(self.heap)[4]
+        project.queued = False
+        return project
+
+
+# Drop a project for good, eg. once it is scheduled or can no longer earn anything
+def remove_waiting_project(project, waiting_projects_dict):
     for skill_name, required_skill_level in project.skills:
-        if skill_name in people_not_in_heap:
-            for person in people_not_in_heap[skill_name]:
-                heapq.heappush(skill_heap_tree[skill_name], (person.get_skill_level(skill_name), person))
+        waiting_projects_dict[skill_name].discard(project)
 
-    return skill_heap_tree, people_not_in_heap
 
-def assign_to_project(project, skill_heap_tree):
+# Eg. [('WebServer', ['Bob', 'Anna']), ...]
+def get_schedule(fully_scheduled_projects):
+    return [(project.name, [worker.name for worker in project.assigned_workers]) for project in fully_scheduled_projects]
 
-    # Eg. people_not_in_heap = {'C++': [Person1, Person2]}
-    people_not_in_heap = {}
-    assigned_workers = []
-    project_fully_scheduled = True
-    global all_assigned_workers
-    global day
 
-    for skill_name, required_skill_level in project.skills:
-        # Get heap tree for skill
-        available_people = skill_heap_tree[skill_name]
-        
-        # If mentor available, then lower skill level by one
-        if check_for_mentor(assigned_workers, skill_name, required_skill_level):
-            min_person, people_not_in_heap, available_people = find_min_person(available_people, required_skill_level - 1, people_not_in_heap, skill_name)
-        else:
-            min_person, people_not_in_heap, available_people = find_min_person(available_people, required_skill_level, people_not_in_heap, skill_name)
+# Validated against the simulator's own bookkeeping before writing: every role filled, known contributors, and nobody on two projects at once
+def output(input_file, num_of_fully_scheduled_projects, fully_scheduled_projects, output_folder, people):
+    input_file_path_obj = Path(input_file)
+    # Eg. outputs/a_an_example.in.txt
+    output_file = Path(output_folder)/(input_file_path_obj.name)
+    project_num_roles = {project.name: project.num_of_roles for project in fully_scheduled_projects}
+    person_names = {person.name for person in people}
+    time_slots = [(project.start_day, project.end_day()) for project in fully_scheduled_projects]
+    write_qualifying_submission(output_file, get_schedule(fully_scheduled_projects), project_num_roles, person_names, time_slots)
 
-        if min_person is None:
-            project_fully_scheduled = False
-            skill_heap_tree, people_not_in_heap = reinsert_people_back_in_heap(project, skill_heap_tree, people_not_in_heap)
-            return [], project_fully_scheduled
-        
-        assigned_workers.append(min_person)
-    
-    skill_heap_tree, people_not_in_heap = reinsert_people_back_in_heap(project, skill_heap_tree, people_not_in_heap)
-    for w in assigned_workers:
-        all_assigned_workers.append((w, project.duration + day))
-    
-    return assigned_workers, project_fully_scheduled
 
+def make_waiting_projects_dict(projects):
+    # Eg. {skill_id: {Project1, Project2}} -- every unscheduled project that needs at least one role with this skill
+    waiting_projects_dict = {}
 
-# Sort Projects Based on value
-def sort_projects(projects):
-    sorted_projects = []
     for project in projects:
-        heapq.heappush(sorted_projects, (project.calculate_value(), project.best_before, project))
-    return sorted_projects
+        for skill_name, required_skill_level in project.skills:
+            waiting_projects_dict.setdefault(skill_name, set()).add(project)
 
+    return waiting_projects_dict
 
-def make_skill_heap_tree_dict(people):
-    # Eg. {'C++': <heap tree of people, where person with min skill_level is at top>}
-    skill_heap_tree_dict = {}
-    
+
+# Finish every project that ends on the next event day: level up its mentored workers and make them available again.
+# Only projects needing a skill held by one of the released workers can have become schedulable, so only those are pushed back onto the project queue. Returns the new day.
+def release_next_workers(release_events, skill_index, waiting_projects_dict, project_queue):
+    next_day = release_events[0][0]
+
+    while release_events and release_events[0][0] == next_day:
+        project = heapq.heappop(release_events)[2]
+        for worker, skill_name in project.level_ups:
+            skill_index.update_skill_level(worker, skill_name, worker.get_skill_level(skill_name) + 1)
+        for worker in project.assigned_workers:
+            skill_index.mark_available(worker)
+            for skill_name in worker.skills:
+                for waiting_project in waiting_projects_dict.get(skill_name, ()):
+                    project_queue.push(waiting_project, next_day)
+
+    return next_day
+
+
+# Replay our schedule with the official scoring rules, to check that it is valid and that the simulator agrees with the scorer
+def check_score(people, projects, fully_scheduled_projects, verbose=True):
+    people_skills = {person.name: {skill_name: person.get_initial_skill_level(skill_name) for skill_name in person.initial_skills} for person in people}
+    projects_dict = {project.name: (project.duration, project.score, project.best_before, list(project.skills)) for project in projects}
+    total_score, results = score_schedule(people_skills, projects_dict, get_schedule(fully_scheduled_projects))
+    if verbose:
+        print_score(total_score, results)
+
+    simulated_score = sum(project_score(project.score, project.best_before, project.end_day()) for project in fully_scheduled_projects)
+    if simulated_score != total_score:
+        print(f'Warning: simulator expected a score of {simulated_score}, but scorer gave {total_score}')
+
+    return total_score
+
+
+# Checkpoint kind (see common.checkpoint) for each staffing mode, eg. CHECKPOINT_KINDS[matching]
+CHECKPOINT_KINDS = {False: b'QUAL', True: b'QMAT'}
+
+# Checkpoint of the simulation as of the start of day (after that day's releases, before anything new is started), as array('i') sections:
+#   [day], busy_until per person, [person id, skill id, level] for every level that differs from the input, [project id, start day, number of workers, worker ids...]
+#   for every scheduled project in start order, [project id, number of level ups, (person id, skill id)...] for every project still running,
+#   ids of the projects still waiting, and ids of the projects queued to be tried today
+def save_schedule_checkpoint(checkpoint, day, people, fully_scheduled_projects, waiting_projects_dict, project_queue):
+    level_changes = array('i')
     for person in people:
         for skill_name in person.skills:
-            heap = skill_heap_tree_dict.get(skill_name, [])
-            heapq.heappush(heap, (person.get_skill_level(skill_name), person))
-            if skill_name not in skill_heap_tree_dict:
-                skill_heap_tree_dict[skill_name] = heap
-                
-    return skill_heap_tree_dict
+            skill_level = person.get_skill_level(skill_name)
+            if skill_level != person.get_initial_skill_level(skill_name):
+                level_changes.extend((person.id, skill_name, skill_level))
 
+    scheduled = array('i')
+    running_level_ups = array('i')
+    for project in fully_scheduled_projects:
+        scheduled.extend((project.id, project.start_day, len(project.assigned_workers)))
+        scheduled.extend(worker.id for worker in project.assigned_workers)
+        if project.end_day() > day:
+            running_level_ups.extend((project.id, len(project.level_ups)))
+            for worker, skill_name in project.level_ups:
+                running_level_ups.extend((worker.id, skill_name))
 
-def output(input_file, num_of_fully_scheduled_projects, fully_scheduled_projects):
-    input_file_path_obj = Path(input_file)
-    output_folder = Path('qualifying/outputs')
-    output_folder.mkdir(parents=True, exist_ok=True)
-    # Eg. outputs\a_an_example.in.txt
-    output_file = output_folder/(input_file_path_obj.name)
-    with output_file.open('w+') as f:
-        f.write(f'{str(num_of_fully_scheduled_projects)}\n')
-        for project in fully_scheduled_projects:
-            f.write(f'{project.name}\n')
-            worker_names = [worker.name for worker in project.assigned_workers]
-            worker_names_str = ' '.join(worker_names)
-            f.write(f'{worker_names_str}\n')
+    waiting_project_ids = array('i', sorted({project.id for waiting_projects in waiting_projects_dict.values() for project in waiting_projects}))
+    queued_project_ids = array('i', sorted(entry[3] for entry in project_queue.heap))
+    busy_until = array('i', (person.busy_until for person in people))
 
+    checkpoint.save([section.tobytes() for section in (array('i', [day]), busy_until, level_changes, scheduled, running_level_ups, waiting_project_ids, queued_project_ids)])
 
-# Main Driver function
-# TODO Increment Skill if mentored
-def main(num_people, num_projects, people, projects, skill_heap_tree_dict, input_file):
-    global day
-    global all_assigned_workers
-    # Projects => [(Project Value, Project Duration, Project Class Object)]
-    projects = sort_projects(projects)
+
+# Restore the state saved by save_schedule_checkpoint into freshly reset people and skill index, and empty schedule structures. Returns the day to carry on from.
+def load_schedule_checkpoint(sections, people, projects, skill_index, waiting_projects_dict, release_events, fully_scheduled_projects, project_queue):
+    day_section, busy_until, level_changes, scheduled, running_level_ups, waiting_project_ids, queued_project_ids = [array('i', section) for section in sections]
+    day = day_section[0]
+
+    for i in range(0, len(level_changes), 3):
+        person_id, skill_name, skill_level = level_changes[i:i + 3]
+        skill_index.update_skill_level(people[person_id], skill_name, skill_level)
+
+    for person in people:
+        person.busy_until = busy_until[person.id]
+        # Workers on a running project are released on its end day, which is always after the checkpoint's day
+        if person.busy_until > day:
+            skill_index.mark_busy(person)
+
+    pos = 0
+    while pos < len(scheduled):
+        project = projects[scheduled[pos]]
+        project.start_day = scheduled[pos + 1]
+        num_workers = scheduled[pos + 2]
+        project.assigned_workers = [people[person_id] for person_id in scheduled[pos + 3:pos + 3 + num_workers]]
+        fully_scheduled_projects.append(project)
+        pos += 3 + num_workers
+
+    pos = 0
+    while pos < len(running_level_ups):
+        project = projects[running_level_ups[pos]]
+        num_level_ups = running_level_ups[pos + 1]
+        level_ups = running_level_ups[pos + 2:pos + 2 + 2*num_level_ups]
+        project.level_ups = [(people[level_ups[i]], level_ups[i + 1]) for i in range(0, len(level_ups), 2)]
+        heapq.heappush(release_events, (project.end_day(), project.id, project))
+        pos += 2 + 2*num_level_ups
+
+    waiting_project_ids = set(waiting_project_ids)
+    for project in projects:
+        if project.id not in waiting_project_ids:
+            remove_waiting_project(project, waiting_projects_dict)
+    for project_id in queued_project_ids:
+        project_queue.push(projects[project_id], day)
+
+    return day
+
+
+# Build the simulator's people, projects and skill index from a loaded input (see common.loader)
+def build_problem(data):
+    # Skills are interned, so people and projects refer to skills by skill id rather than skill name
+    skill_matrix = SkillMatrix(data)
+    people = []
+    for person_id in range(data.num_people):
+        start, end = data.person_skill_start[person_id], data.person_skill_start[person_id + 1]
+        people.append(Person(person_id, data.person_names[person_id], skill_matrix, data.person_skill_ids[start:end]))
+
+    projects = [Project(project_id, data) for project_id in range(data.num_projects)]
+
+    skill_index = SkillIndex(people)
+
+    return people, projects, skill_index
+
+
+# Discrete-event simulation: rather than stepping forward one day at a time, keep a min-heap of the days on which workers are released and jump straight to the next one.
+# Returns the fully scheduled projects, in the order they were started.
+# With a checkpoint, the state is saved every so often at the start of a day, and resume=True carries on from the last save instead of day 0.
+# With a profiler, queue and release counts are tallied, and projects attempted vs scheduled are recorded for every day.
+# With matching=True, roles are staffed by assign_to_project_with_matching instead of the greedy assign_to_project.
+def schedule_projects(people, projects, skill_index, ordering=order_by_value, rng=None, verbose=True, checkpoint=None, resume=False, profiler=None, matching=False):
+    # Start everyone free on day 0 with their original skills, so this can be run more than once on the same people
+    for person in people:
+        person.busy_until = 0
+        skill_index.mark_available(person)
+        for skill_name in set(person.skills) | set(person.initial_skills):
+            skill_index.update_skill_level(person, skill_name, person.get_initial_skill_level(skill_name))
+    day = 0
+    waiting_projects_dict = make_waiting_projects_dict(projects)
+    # Eg. [(day project finishes and its workers are free again, Project Id, Project1), ...]
+    release_events = []
     fully_scheduled_projects = []
-    
-    while (len(fully_scheduled_projects) < num_projects) and day < 100:
-        not_fully_scheduled_projects = []
+    project_queue = ProjectQueue(ordering, rng)
+    for project in projects:
+        project.queued = False
+
+    sections = checkpoint.load() if checkpoint and resume else None
+    if sections:
+        day = load_schedule_checkpoint(sections, people, projects, skill_index, waiting_projects_dict, release_events, fully_scheduled_projects, project_queue)
+        if verbose:
+            print(f'Resumed from checkpoint: {day=}, {len(fully_scheduled_projects)} projects already scheduled')
+    else:
+        if resume and verbose:
+            print('No checkpoint to resume from, starting from day 0')
         for project in projects:
-            project = project[2]
-            assigned_workers, project_fully_scheduled = assign_to_project(project, skill_heap_tree_dict)
-            project.assigned_workers = assigned_workers
+            project_queue.push(project, day)
+
+    scarcity = ExpertScarcity({project for waiting_projects in waiting_projects_dict.values() for project in waiting_projects}, skill_index) if matching else None
+
+    last_progress_time = time.perf_counter()
+    while True:
+        num_popped = len(project_queue)
+        num_scheduled = len(fully_scheduled_projects)
+        while project_queue:
+            project = project_queue.pop()
+            if project.is_dead(day):
+                remove_waiting_project(project, waiting_projects_dict)
+                if scarcity:
+                    scarcity.remove_project(project)
+                continue
+
+            if scarcity:
+                assigned_workers, project_fully_scheduled = assign_to_project_with_matching(project, skill_index, day, scarcity)
+            else:
+                assigned_workers, project_fully_scheduled = assign_to_project(project, skill_index, day)
             if project_fully_scheduled:
+                project.assigned_workers = assigned_workers
+                project.start_day = day
                 fully_scheduled_projects.append(project)
-            else:
-                not_fully_scheduled_projects.append(project)
+                remove_waiting_project(project, waiting_projects_dict)
+                if scarcity:
+                    scarcity.remove_project(project)
+                heapq.heappush(release_events, (project.end_day(), project.id, project))
+
+        if profiler:
+            # Nothing is pushed while the queue is drained, so everything in it at the start of the day was popped
+            num_scheduled = len(fully_scheduled_projects) - num_scheduled
+            profiler.count('queue_pops', num_popped)
+            profiler.count('projects_scheduled', num_scheduled)
+            profiler.count('release_event_pushes', num_scheduled)
+            profiler.record('days', day=day, popped=num_popped, scheduled=num_scheduled)
+
+        # Nobody is working, so no worker will ever be released and no remaining project can become schedulable
+        if not release_events:
+            break
+
+        num_release_events = len(release_events)
+        day = release_next_workers(release_events, skill_index, waiting_projects_dict, project_queue)
+        if profiler:
+            profiler.count('release_event_pops', num_release_events - len(release_events))
+            # Waiting projects woken up by the released workers, to be tried again today
+            profiler.count('reinsertions', len(project_queue))
+        # Progress every few seconds, rather than a print per day
+        if verbose and time.perf_counter() - last_progress_time >= 5:
+            last_progress_time = time.perf_counter()
+            print(f'{day=} ({len(fully_scheduled_projects)} projects scheduled)')
+        if checkpoint and checkpoint.is_due():
+            save_schedule_checkpoint(checkpoint, day, people, fully_scheduled_projects, waiting_projects_dict, project_queue)
+
+    return fully_scheduled_projects
 
-        projects = sort_projects(not_fully_scheduled_projects)
-        day += 1
-        print(f'{day=}')
 
-        for w in all_assigned_workers:
-            if w[1] == day:
-                all_assigned_workers.remove(w)
-                
-    output(input_file, len(fully_scheduled_projects), fully_scheduled_projects)
+# Main Driver function
+def main(num_people, num_projects, people, projects, skill_index, input_file, output_folder, checkpoint=None, resume=False, profiler=None, matching=False):
+    if profiler:
+        profiler.count_calls(skill_index, 'is_project_feasible', 'feasibility_checks')
+        profiler.count_calls(skill_index, 'find_min_person', 'find_min_person_calls')
+
+    with timed(profiler, 'schedule'):
+        fully_scheduled_projects = schedule_projects(people, projects, skill_index, checkpoint=checkpoint, resume=resume, profiler=profiler, matching=matching)
+    with timed(profiler, 'output'):
+        output(input_file, len(fully_scheduled_projects), fully_scheduled_projects, output_folder, people)
+    with timed(profiler, 'check_score'):
+        check_score(people, projects, fully_scheduled_projects)
+    if checkpoint:
+        checkpoint.remove()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Schedule the projects of a qualifying input')
+    parser.add_argument('input_file', type=Path)
+    parser.add_argument('--output-dir', type=Path, default=Path(__file__).resolve().parent/'outputs')
+    parser.add_argument('--matching', action='store_true', help='staff each project with a min-cost matching that saves scarce experts, instead of greedily')
+    parser.add_argument('--resume', action='store_true', help='carry on from the last checkpoint of an interrupted run on this input')
+    parser.add_argument('--checkpoint-interval', type=float, default=30, help='seconds between checkpoints')
+    parser.add_argument('--profile', action='store_true', help='write a JSON report of counters and timers to qualifying/profiles')
+    parser.add_argument('--cprofile', action='store_true', help='with --profile, also save cProfile stats (eg. for snakeviz or a flamegraph)')
+    args = parser.parse_args()
+
+    input_file = args.input_file
+    profiler = Profiler() if args.profile else None
+
     # Read input data
-    input_file = sys.argv[1]
     # input_file = Path('qualifying/input_data/a_an_example.in.txt')
-    with open(input_file, encoding='utf8') as f:
-        
-        num_people, num_projects = [int(int_str) for int_str in f.readline().split()]
-        
-        people = []
-        for i in range(num_people):
-            name, num_skills_str = f.readline().split()
-            num_skills = int(num_skills_str)
-            skills_dict = {}
-            for i in range(num_skills):
-                skill_name, skill_level_str = f.readline().split()
-                skill_level = int(skill_level_str)
-                skills_dict[skill_name] = skill_level
-            people.append(Person(name, skills_dict))
-
-        projects = []
-        for i in range(num_projects):
-            name, duration_str, score_str, best_before_str, num_roles_str = f.readline().split()
-            duration, score, best_before, num_roles = int(duration_str), int(score_str), int(best_before_str), int(num_roles_str)
-            skills_list = []
-            for i in range(num_roles):
-                skill_name, required_skill_level_str = f.readline().split()
-                required_skill_level = int(required_skill_level_str)
-                # E.g. [('skill_name', required_level), ...]
-                skills_list.append((skill_name, required_skill_level))
-                
-            projects.append(Project(name, duration, score, best_before, num_roles, skills_list))
-
-        skill_heap_tree_dict = make_skill_heap_tree_dict(people)
-
-        main(num_people, num_projects, people, projects, skill_heap_tree_dict, input_file)
+    with timed(profiler, 'parse'):
+        data = load_qualifying_input_cached(input_file)
+    num_people, num_projects = data.num_people, data.num_projects
+
+    with timed(profiler, 'build'):
+        people, projects, skill_index = build_problem(data)
+
+    # The staffing mode is part of the kind, so each mode has its own checkpoint file, and a run is only ever resumed in the mode it was started in
+    checkpoints_folder = Path(__file__).resolve().parent/'checkpoints'
+    checkpoint_kind = CHECKPOINT_KINDS[args.matching]
+    checkpoint = Checkpoint(get_checkpoint_file(checkpoints_folder, input_file, checkpoint_kind), checkpoint_kind, input_file, args.checkpoint_interval)
+    if args.resume and checkpoint.get_saved_kind() is None:
+        other_kind = CHECKPOINT_KINDS[not args.matching]
+        if Checkpoint(get_checkpoint_file(checkpoints_folder, input_file, other_kind), other_kind, input_file).get_saved_kind() == other_kind:
+            parser.error(f'the checkpoint for {input_file.name} was saved ' + ('without' if args.matching else 'with') + ' --matching, resume it the same way')
+
+    main_args = (num_people, num_projects, people, projects, skill_index, input_file, args.output_dir, checkpoint, args.resume, profiler, args.matching)
+    profiles_folder = Path(__file__).resolve().parent/'profiles'
+    if profiler and args.cprofile:
+        run_with_cprofile(profiles_folder/f'{input_file.name}.prof', main, *main_args)
+    else:
+        main(*main_args)
+
+    if profiler:
+        profiler.write_report(profiles_folder/f'{input_file.name}.json')
+        print(f'Profile written to {profiles_folder}')